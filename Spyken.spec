@@ -1,8 +1,18 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# Default: single-file build (Spyken.exe).
+# Startup-optimised build: SPYKEN_ONEDIR=1 pyinstaller Spyken.spec
+#   A onedir build does not unpack the whole payload to a temp dir on every
+#   launch, and without UPX the DLLs need no decompression, so the window
+#   appears as soon as flet is loaded; the PDF/TTS/video stacks are imported
+#   from disk only when a conversion needs them.
+
+import os
 
 from PyInstaller.utils.hooks import copy_metadata
 
+ONEDIR = os.environ.get("SPYKEN_ONEDIR", "") not in ("", "0")
+
 datas  = copy_metadata('imageio')
 datas += copy_metadata('imageio-ffmpeg')
 datas += copy_metadata('moviepy')
@@ -23,23 +33,51 @@ a = Analysis(
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='Spyken',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-)
+if ONEDIR:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='Spyken',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=False,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        upx_exclude=[],
+        name='Spyken',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='Spyken',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=True,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+    )
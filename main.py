@@ -1,11 +1,15 @@
-import flet as ft
-import fitz  # PyMuPDF
-import docx
-import edge_tts
+# Heavy backends (flet, fitz, edge_tts, moviepy, PIL, numpy, mutagen) are
+# imported inside the functions that need them, so the window appears before
+# the PDF/TTS/video stacks are loaded. See measure_import_costs().
 import asyncio
+import functools
 import os
+import random
+import subprocess
 import tempfile
 import textwrap
+import threading
+import time
 
 VOICE_MALE = "el-GR-NestorasNeural"
 VOICE_FEMALE = "el-GR-AthinaNeural"
@@ -17,6 +21,40 @@ VIDEO_W = 1280
 VIDEO_H = 720
 VIDEO_FPS = 10  # Reduced from 24 to speed up rendering significantly
 
+# Named output profiles: resolution, frame rate and x264 encoder settings.
+# "standard" matches the constants above; "draft" is for quick previews,
+# "archive" for the final full-quality render.
+OUTPUT_PROFILES = {
+    "draft": {
+        "label": "Πρόχειρο (640x360)",
+        "width": 640, "height": 360, "fps": 5,
+        "codec": "libx264", "preset": "ultrafast", "crf": 30,
+        "audio_bitrate": "64k",
+    },
+    "standard": {
+        "label": "Κανονικό (1280x720)",
+        "width": VIDEO_W, "height": VIDEO_H, "fps": VIDEO_FPS,
+        "codec": "libx264", "preset": "medium", "crf": 23,
+        "audio_bitrate": "128k",
+    },
+    "archive": {
+        "label": "Αρχείο (1920x1080)",
+        "width": 1920, "height": 1080, "fps": 24,
+        "codec": "libx264", "preset": "slow", "crf": 18,
+        "audio_bitrate": "192k",
+    },
+}
+DEFAULT_PROFILE = "standard"
+
+
+def get_output_profile(name: str = None) -> dict:
+    """Return the output profile dict for name (falls back to DEFAULT_PROFILE)."""
+    if not name:
+        name = DEFAULT_PROFILE
+    if name not in OUTPUT_PROFILES:
+        raise ValueError(f"Άγνωστο προφίλ εξόδου: {name}")
+    return OUTPUT_PROFILES[name]
+
 # Fluorescent green highlight color
 HIGHLIGHT_COLOR = (57, 255, 20)
 
@@ -78,146 +116,1222 @@ def chunk_text(text: str, max_chars: int = 800) -> list[str]:
     return chunks
 
 
-def extract_paragraphs(filepath: str) -> list[str]:
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+
+
+def iter_docx_paragraphs(filepath: str):
+    """
+    Stream the raw text of every paragraph in a .docx, in document order,
+    by iterparsing word/document.xml straight from the zip archive.
+
+    Unlike python-docx's Document.paragraphs this includes paragraphs inside
+    tables (and text boxes, yielded just before their host paragraph), and never
+    builds the full object tree: consumed elements are pruned so memory stays
+    flat for very large files. Word stores each text box twice (DrawingML in
+    mc:Choice, VML in mc:Fallback); only the mc:Choice copy is read.
+    """
+    import zipfile
+    from xml.etree.ElementTree import iterparse
+
+    P, T, TAB, TABS = _W_NS + "p", _W_NS + "t", _W_NS + "tab", _W_NS + "tabs"
+    BR, CR, HYPHEN = _W_NS + "br", _W_NS + "cr", _W_NS + "noBreakHyphen"
+    BODY = _W_NS + "body"
+    FALLBACK = _MC_NS + "Fallback"
+
+    with zipfile.ZipFile(filepath) as zf, zf.open("word/document.xml") as xml_file:
+        elems = []    # open elements, root first
+        buffers = []  # text parts of the open (possibly nested) paragraphs
+        in_tabs = 0   # inside <w:tabs> tab-stop definitions, not real tabs
+        in_fallback = 0  # inside <mc:Fallback>, a duplicate of the mc:Choice content
+        body = None
+
+        for event, elem in iterparse(xml_file, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                elems.append(elem)
+                if tag == FALLBACK:
+                    in_fallback += 1
+                elif in_fallback:
+                    pass
+                elif tag == P:
+                    buffers.append([])
+                elif tag == TABS:
+                    in_tabs += 1
+                elif tag == BODY:
+                    body = elem
+                continue
+
+            elems.pop()
+            if in_fallback:
+                if tag == FALLBACK:
+                    in_fallback -= 1
+                continue
+            if buffers:
+                if tag == T:
+                    buffers[-1].append(elem.text or "")
+                elif tag == TAB and not in_tabs:
+                    buffers[-1].append("\t")
+                elif tag in (BR, CR):
+                    buffers[-1].append("\n")
+                elif tag == HYPHEN:
+                    buffers[-1].append("-")
+            if tag == TABS:
+                in_tabs -= 1
+            elif tag == P:
+                yield "".join(buffers.pop())
+                elem.clear()
+
+            # Drop finished top-level body children (paragraphs, tables)
+            if body is not None and elems and elems[-1] is body:
+                body.remove(elem)
+
+
+def iter_paragraphs(filepath: str):
+    """
+    Yield the valid paragraphs of a .docx or .pdf file in reading order.
+    DOCX is streamed from the XML (iter_docx_paragraphs) and PDF pages are
+    parsed in parallel for large documents (iter_pdf_page_blocks), so the first
+    paragraphs are available before the whole file is parsed.
+    """
     ext = filepath.lower().split('.')[-1]
-    paragraphs = []
 
     if ext == 'docx':
-        doc = docx.Document(filepath)
-        for p in doc.paragraphs:
-            text = p.text.strip()
+        for text in iter_docx_paragraphs(filepath):
+            text = text.strip()
             if is_valid_text(text):
-                paragraphs.append(text)
+                yield text
     elif ext == 'pdf':
-        doc = fitz.open(filepath)
-        for page in doc:
-            blocks = page.get_text("blocks")
-            merged = merge_pdf_blocks(blocks)
+        for page_idx, merged in iter_pdf_page_blocks(filepath):
             for (x0, y0, x1, y1, text) in merged:
                 if is_valid_text(text):
-                    paragraphs.append(text)
+                    yield text
     else:
         raise ValueError("Μη υποστηριζόμενη μορφή αρχείου")
 
-    return paragraphs
 
+def extract_paragraphs(filepath: str) -> list[str]:
+    return list(iter_paragraphs(filepath))
 
-def merge_pdf_blocks(blocks: list) -> list:
+
+# ─────────────────────────── PDF PAGE LAYOUT ──────────────────────────────────
+
+PDF_LINE_MERGE_FACTOR = 1.8   # max gap to the next line, in line heights
+PDF_SAME_LINE_GAP = 3.0       # max gap between fragments of one line, in line heights
+PDF_MIN_GUTTER = 10.0         # min width (pt) of an empty strip between columns
+PDF_GUTTER_FILL = 0.05        # a gutter may hold text up to this share of the text height
+PDF_SPAN_WIDTH = 0.6          # blocks wider than this share of the text width span columns
+PDF_MIN_COLUMN_EXTENT = 0.3   # a column must reach this share of the text height
+
+
+def _pdf_column_gutters(x0, y0, x1, y1):
+    """
+    Column gutters of a page as a sorted (n, 2) NumPy array of [start, end] x.
+    The text height over each point of the page width (narrower blocks only)
+    is summed with a difference array; runs of at least PDF_MIN_GUTTER points
+    where it stays under PDF_GUTTER_FILL of the text height are gutters, if
+    the text on both sides is tall enough to be a column (so a page number
+    or a short table does not split the page).
+    """
+    import numpy as np
+
+    left = np.floor(x0.min())
+    width = max(float(np.ceil(x1.max()) - left), 1.0)
+    narrow = (x1 - x0) <= width * PDF_SPAN_WIDTH
+    if not narrow.any():
+        return np.empty((0, 2))
+
+    bins = int(width) + 1
+    height = max(float(y1.max() - y0.min()), 1.0)
+    block_h = (y1 - y0)[narrow]
+    diff = np.zeros(bins + 1)
+    np.add.at(diff, np.clip((x0[narrow] - left).astype(np.int64), 0, bins), block_h)
+    np.add.at(diff, np.clip(np.ceil(x1[narrow] - left).astype(np.int64), 0, bins), -block_h)
+    covered = np.cumsum(diff[:-1]) > PDF_GUTTER_FILL * height
+    if not covered.any():
+        return np.empty((0, 2))
+
+    idx = np.flatnonzero(covered)
+    inner = ~covered[idx[0]:idx[-1] + 1]
+    edges = np.diff(np.concatenate(([0], inner.astype(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+    wide = (run_ends - run_starts) >= PDF_MIN_GUTTER
+    gutters = np.stack((run_starts[wide], run_ends[wide]), axis=1) + left + idx[0]
+
+    kept = []
+    for g0, g1 in gutters:
+        lhs = x1 <= g0 + 1
+        rhs = x0 >= g1 - 1
+        if (lhs.any() and rhs.any()
+                and y1[lhs].max() - y0[lhs].min() >= PDF_MIN_COLUMN_EXTENT * height
+                and y1[rhs].max() - y0[rhs].min() >= PDF_MIN_COLUMN_EXTENT * height):
+            kept.append((g0, g1))
+    return np.array(kept, dtype=np.float64).reshape(-1, 2)
+
+
+def layout_pdf_blocks(blocks: list) -> list:
     """
-    Merge adjacent PDF text blocks that belong to the same paragraph.
-    Two consecutive blocks are merged when they are vertically close
-    (gap ≤ 1.8 × estimated line height) and horizontally overlapping.
+    Reading order and paragraph clustering of one page's text blocks, on
+    NumPy arrays (sorting is the only super-linear step).
+
+    - Columns are found from gutters (see _pdf_column_gutters).
+    - Blocks crossing a gutter (titles, wide figures) or lying inside one
+      (centred footers, page numbers) cut the page into bands; a band is read column by column, each top to bottom, with
+      blocks on the same line left to right.
+    - Consecutive blocks of one column form a paragraph when they continue
+      the same line, or when the next line starts within
+      PDF_LINE_MERGE_FACTOR line heights and overlaps horizontally.
 
     Input : list of fitz block tuples (x0, y0, x1, y1, text, block_no, block_type)
-    Returns: list of (x0, y0, x1, y1, text) tuples.
+    Returns: list of (x0, y0, x1, y1, text) tuples in reading order.
     """
-    # Keep only text blocks (block_type == 0)
-    text_blocks = [b for b in blocks if b[6] == 0]
+    import numpy as np
 
+    # Keep only text blocks (block_type == 0) with some text
+    text_blocks = [b for b in blocks if b[6] == 0 and b[4].strip()]
     if not text_blocks:
         return []
 
-    merged = []
-    cur_x0, cur_y0, cur_x1, cur_y1, cur_text = (
-        text_blocks[0][0], text_blocks[0][1],
-        text_blocks[0][2], text_blocks[0][3],
-        text_blocks[0][4].strip(),
-    )
+    n = len(text_blocks)
+    texts = [b[4].strip() for b in text_blocks]
+    x0, y0, x1, y1 = np.array([b[:4] for b in text_blocks], dtype=np.float64).T
+    n_lines = np.fromiter((t.count("\n") + 1 for t in texts), dtype=np.float64, count=n)
+    line_h = np.maximum((y1 - y0) / n_lines, 1.0)
+
+    # ── Columns and bands
+    gutters = _pdf_column_gutters(x0, y0, x1, y1)
+    boundaries = gutters.mean(axis=1)
+    spanning = ((x0[:, None] < boundaries - 2) & (x1[:, None] > boundaries + 2)).any(axis=1)
+    # A block within a gutter belongs to no column; read it in its own band
+    spanning |= ((x0[:, None] >= gutters[:, 0] - 1) & (x1[:, None] <= gutters[:, 1] + 1)).any(axis=1)
+    column = np.searchsorted(boundaries, (x0 + x1) / 2)
+    column[spanning] = 0
+    # Band = number of spanning blocks starting above; a spanning block sits
+    # between the band above it and the band below
+    band = np.searchsorted(np.sort(y0[spanning]), y0, side="right")
+    group = np.where(spanning, 2 * band - 1, 2 * band)
+
+    # ── Lines: blocks of one column whose tops are within half a line height
+    by_top = np.lexsort((y0, column, group))
+    tol = 0.5 * float(np.median(line_h))
+    new_line = np.ones(n, dtype=bool)
+    new_line[1:] = ((group[by_top][1:] != group[by_top][:-1])
+                    | (column[by_top][1:] != column[by_top][:-1])
+                    | (np.diff(y0[by_top]) > tol))
+    line_id = np.empty(n, dtype=np.int64)
+    line_id[by_top] = np.cumsum(new_line) - 1
+    n_rows = int(line_id.max()) + 1
+
+    row_x0 = np.full(n_rows, np.inf)
+    row_x1 = np.full(n_rows, -np.inf)
+    row_y0 = np.full(n_rows, np.inf)
+    row_y1 = np.full(n_rows, -np.inf)
+    row_h = np.zeros(n_rows)
+    np.minimum.at(row_x0, line_id, x0)
+    np.maximum.at(row_x1, line_id, x1)
+    np.minimum.at(row_y0, line_id, y0)
+    np.maximum.at(row_y1, line_id, y1)
+    np.maximum.at(row_h, line_id, line_h)
+
+    # ── Reading order and paragraph breaks
+    order = np.lexsort((x0, line_id))
+    lid = line_id[order]
+    prev_l, cur_l = lid[:-1], lid[1:]
+    same_column = (group[order][1:] == group[order][:-1]) & (column[order][1:] == column[order][:-1])
+    lh = row_h[prev_l]
+
+    same_line_join = (x0[order][1:] - x1[order][:-1]) <= PDF_SAME_LINE_GAP * lh
+    v_gap = row_y0[cur_l] - row_y1[prev_l]
+    h_overlap = np.minimum(row_x1[prev_l], row_x1[cur_l]) - np.maximum(row_x0[prev_l], row_x0[cur_l])
+    next_line_join = (v_gap >= -0.5 * lh) & (v_gap <= PDF_LINE_MERGE_FACTOR * lh) & (h_overlap > -20)
+
+    join = same_column & np.where(prev_l == cur_l, same_line_join, next_line_join)
+    starts = np.flatnonzero(np.concatenate(([True], ~join)))
+
+    px0 = np.minimum.reduceat(x0[order], starts)
+    py0 = np.minimum.reduceat(y0[order], starts)
+    px1 = np.maximum.reduceat(x1[order], starts)
+    py1 = np.maximum.reduceat(y1[order], starts)
 
-    for b in text_blocks[1:]:
-        bx0, by0, bx1, by1, btxt = b[0], b[1], b[2], b[3], b[4].strip()
+    result = []
+    bounds = list(starts) + [n]
+    for p in range(len(starts)):
+        text = " ".join(texts[i] for i in order[bounds[p]:bounds[p + 1]])
+        # Clean up internal newlines in each merged block
+        clean = " ".join(text.splitlines()).strip()
+        result.append((float(px0[p]), float(py0[p]), float(px1[p]), float(py1[p]), clean))
+    return result
 
-        # Estimate line height of current block
-        cur_height = cur_y1 - cur_y0
-        lines_estimate = max(1, cur_text.count('\n') + 1)
-        line_h = cur_height / lines_estimate
 
-        # Vertical gap between end of current block and start of next
-        v_gap = by0 - cur_y1
+def merge_pdf_blocks(blocks: list) -> list:
+    """
+    Merge the text blocks of a PDF page into paragraphs in reading order
+    (multi-column aware, see layout_pdf_blocks).
 
-        # Horizontal overlap check: blocks share at least some horizontal range
-        h_overlap = min(cur_x1, bx1) - max(cur_x0, bx0)
+    Input : list of fitz block tuples (x0, y0, x1, y1, text, block_no, block_type)
+    Returns: list of (x0, y0, x1, y1, text) tuples.
+    """
+    return layout_pdf_blocks(blocks)
 
-        if v_gap >= 0 and v_gap <= line_h * 1.8 and h_overlap > -20:
-            # Merge: join with a space (replace internal newlines too)
-            cur_text = cur_text + " " + btxt
-            cur_x0 = min(cur_x0, bx0)
-            cur_y1 = by1
-            cur_x1 = max(cur_x1, bx1)
-        else:
-            merged.append((cur_x0, cur_y0, cur_x1, cur_y1, cur_text))
-            cur_x0, cur_y0, cur_x1, cur_y1, cur_text = bx0, by0, bx1, by1, btxt
 
-    merged.append((cur_x0, cur_y0, cur_x1, cur_y1, cur_text))
+# ─────────────────────────── PARALLEL PDF EXTRACTION ──────────────────────────
 
-    # Clean up internal newlines in each merged block
-    result = []
-    for (x0, y0, x1, y1, t) in merged:
-        clean = " ".join(t.splitlines()).strip()
-        result.append((x0, y0, x1, y1, clean))
+# Below this many pages a process pool costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 48
+# Pages per worker task; the first task is small so page 1 comes back quickly
+PDF_PAGES_PER_TASK = 16
+PDF_FIRST_TASK_PAGES = 2
 
-    return result
+
+def _extract_pdf_page_range(filepath: str, start: int, stop: int) -> list[list[tuple]]:
+    """Process-pool worker: merged text blocks for pages [start, stop), own fitz handle."""
+    import fitz  # PyMuPDF
+    doc = fitz.open(filepath)
+    try:
+        return [merge_pdf_blocks(doc[p].get_text("blocks")) for p in range(start, stop)]
+    finally:
+        doc.close()
+
+
+def _pdf_page_ranges(page_count: int) -> list[tuple[int, int]]:
+    ranges = []
+    start = 0
+    size = PDF_FIRST_TASK_PAGES
+    while start < page_count:
+        stop = min(page_count, start + size)
+        ranges.append((start, stop))
+        start = stop
+        size = PDF_PAGES_PER_TASK
+    return ranges
+
+
+def iter_pdf_page_blocks(filepath: str, workers: int = None):
+    """
+    Yield (page_idx, merged_blocks) for every page, in page order.
+
+    Large documents are split into page ranges parsed by a process pool (each
+    worker opens its own fitz document); results are yielded in order as soon
+    as each range finishes, so callers can start on page 1 while later pages
+    are still being parsed. Small documents are parsed inline.
+    """
+    import fitz  # PyMuPDF
+    doc = fitz.open(filepath)
+    page_count = doc.page_count
+    if workers is None:
+        workers = min(os.cpu_count() or 1, 8)
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or workers <= 1:
+        try:
+            for page_idx, page in enumerate(doc):
+                yield page_idx, merge_pdf_blocks(page.get_text("blocks"))
+        finally:
+            doc.close()
+        return
+    doc.close()
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    ranges = _pdf_page_ranges(page_count)
+    # spawn, not fork: the caller runs inside the Flet loop with live threads
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [pool.submit(_extract_pdf_page_range, filepath, a, b) for a, b in ranges]
+        for (start, _), fut in zip(ranges, futures):
+            for offset, merged in enumerate(fut.result()):
+                yield start + offset, merged
+    finally:
+        # Also reached when the consumer stops early (cancel / preview)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ─────────────────────────── TTS SCHEDULER ────────────────────────────────────
+
+class TTSUnavailableError(RuntimeError):
+    """Raised when the TTS circuit breaker is open and requests are refused."""
+
+
+def _is_throttle_error(ex: Exception) -> bool:
+    """
+    True if ex, or an error it was raised from, is an HTTP 429 rejection
+    (aiohttp's ClientResponseError / WSServerHandshakeError carry .status).
+    """
+    for _ in range(5):
+        if ex is None:
+            return False
+        if getattr(ex, "status", None) == 429:
+            return True
+        ex = ex.__cause__ or ex.__context__
+    return False
+
+
+class TTSScheduler:
+    """
+    Central gate for every edge-tts request.
+
+    - token bucket: at most `rate` requests/s on average, bursts up to `burst`
+      (the rate is halved on HTTP 429 and slowly recovers on success)
+    - exponential backoff with full jitter between attempts
+    - circuit breaker: after `breaker_threshold` consecutive failed requests
+      (all attempts used up) new requests are refused with TTSUnavailableError
+      for `breaker_cooldown` s
+    - per-request latency and failure statistics (see stats())
+
+    State is guarded by a threading.Lock so conversions running on different
+    event loops (worker threads) share the same limits. Processes sharing one
+    budget (shard workers) each take a share of it, see share().
+    """
+
+    def __init__(self, rate: float = 4.0, burst: int = 4, max_attempts: int = 4,
+                 base_delay: float = 0.5, max_delay: float = 16.0,
+                 breaker_threshold: int = 10, breaker_cooldown: float = 60.0,
+                 max_concurrency: int = 4):
+        from collections import deque
+
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.max_concurrency = max_concurrency
+        self._full_limits = (rate, burst, max_concurrency)
+        self.breaker_path = None  # breaker state shared with other processes
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._semaphores = {}  # event loop -> asyncio.Semaphore
+        self._latencies = deque(maxlen=2000)
+        self._counts = {}
+        self.reset_stats()
+
+    # ── statistics ──────────────────────────────────────────────────────────
+
+    def reset_stats(self):
+        with self._lock:
+            self._latencies.clear()
+            self._counts = {
+                "requests": 0, "succeeded": 0, "failed": 0,
+                "attempts": 0, "retries": 0, "throttled": 0,
+                "breaker_trips": 0, "rejected": 0,
+            }
+
+    def stats(self) -> dict:
+        """Snapshot of counters plus latency percentiles (seconds) of successful attempts."""
+        with self._lock:
+            out = dict(self._counts)
+            lat = sorted(self._latencies)
+            out["rate"] = round(self.rate, 2)
+            out["breaker_open"] = time.monotonic() < self._open_until
+        if lat:
+            out["latency_avg"] = sum(lat) / len(lat)
+            out["latency_p50"] = lat[len(lat) // 2]
+            out["latency_p95"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))]
+            out["latency_max"] = lat[-1]
+        return out
+
+    def format_stats(self) -> str:
+        st = self.stats()
+        txt = (f"TTS: {st['requests']} αιτήματα, {st['failed']} αποτυχίες, "
+               f"{st['retries']} επαναλήψεις, {st['throttled']} περιορισμοί (429)")
+        if "latency_avg" in st:
+            txt += f", μέση καθυστέρηση {st['latency_avg'] * 1000:.0f} ms (p95 {st['latency_p95'] * 1000:.0f} ms)"
+        return txt
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._counts[key] += n
+
+    # ── rate limit / breaker ────────────────────────────────────────────────
+
+    def share(self, n: int, breaker_path: str = None):
+        """
+        Keep this process to 1/n of the request rate, burst and concurrency,
+        for n processes drawing on the same TTS budget. With breaker_path a
+        tripped breaker is written there (wall-clock reopen time) and
+        honoured by every process sharing the file.
+        """
+        rate, burst, concurrency = self._full_limits
+        n = max(1, n)
+        with self._lock:
+            self.base_rate = self.rate = rate / n
+            self.burst = max(1, burst // n)
+            self._tokens = min(self._tokens, float(self.burst))
+            self.max_concurrency = max(1, concurrency // n)
+            self._semaphores = {}
+            self.breaker_path = breaker_path
+
+    def _shared_breaker_open(self) -> bool:
+        try:
+            with open(self.breaker_path, encoding="utf-8") as f:
+                return time.time() < float(f.read())
+        except (OSError, ValueError):
+            return False
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sem = self._semaphores.get(loop)
+            if sem is None:
+                # Drop semaphores of finished loops
+                self._semaphores = {l: s for l, s in self._semaphores.items() if not l.is_closed()}
+                sem = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return sem
+
+    def _take_token(self) -> float:
+        """Consume one token; returns 0 on success or the seconds to wait before retrying."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def _check_breaker(self):
+        shared_open = self.breaker_path is not None and self._shared_breaker_open()
+        with self._lock:
+            if shared_open or time.monotonic() < self._open_until:
+                self._counts["rejected"] += 1
+                raise TTSUnavailableError(
+                    "Η υπηρεσία TTS δεν αποκρίνεται (πολλές συνεχόμενες αποτυχίες). "
+                    "Δοκιμάστε ξανά σε λίγο."
+                )
+
+    def _backoff(self, attempt: int, throttled: bool) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        if throttled:
+            delay = min(self.max_delay, delay * 2)
+        return random.uniform(0, delay)
+
+    def _on_success(self, latency: float):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._latencies.append(latency)
+            self.rate = min(self.base_rate, self.rate * 1.05)
+
+    def _on_failure(self, throttled: bool):
+        with self._lock:
+            if throttled:
+                self._counts["throttled"] += 1
+                self.rate = max(0.25, self.rate / 2)
+
+    def _on_exhausted(self):
+        """A request failed after all its attempts."""
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.breaker_threshold:
+                self._open_until = time.monotonic() + self.breaker_cooldown
+                self._consecutive_failures = 0
+                self._counts["breaker_trips"] += 1
+                if self.breaker_path:
+                    tmp = f"{self.breaker_path}.{os.getpid()}.tmp"
+                    try:
+                        with open(tmp, "w", encoding="utf-8") as f:
+                            f.write(repr(time.time() + self.breaker_cooldown))
+                        os.replace(tmp, self.breaker_path)
+                    except OSError:
+                        pass
+
+    # ── entry point ─────────────────────────────────────────────────────────
+
+    async def run(self, attempt_fn, breaker: bool = True):
+        """
+        Run the coroutine function attempt_fn (one request per call) under the
+        rate limit, retrying with backoff. Returns its result, or None when all
+        attempts failed. Raises TTSUnavailableError while the breaker is open.
+        breaker=False keeps a failed request out of the breaker count (a
+        fallback for a request that already counted).
+        """
+        self._count("requests")
+        for attempt in range(self.max_attempts):
+            self._check_breaker()
+            wait = self._take_token()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self._take_token()
+
+            self._count("attempts")
+            if attempt:
+                self._count("retries")
+            start = time.monotonic()
+            throttled = False
+            try:
+                async with self._semaphore():
+                    result = await attempt_fn()
+                self._on_success(time.monotonic() - start)
+                self._count("succeeded")
+                return result
+            except TTSUnavailableError:
+                raise
+            except Exception as ex:
+                throttled = _is_throttle_error(ex)
+                self._on_failure(throttled)
+
+            if attempt < self.max_attempts - 1:
+                await asyncio.sleep(self._backoff(attempt, throttled))
+
+        self._count("failed")
+        if breaker:
+            self._on_exhausted()
+        return None
+
+
+tts_scheduler = TTSScheduler()
 
 
 # ─────────────────────────── TTS WITH WORD TIMING ─────────────────────────────
 
-async def generate_tts_with_word_timings(text: str, voice: str, out_path: str) -> list[dict]:
+async def generate_tts_with_word_timings(text: str, voice: str, store: "ScratchStore",
+                                         name: str) -> list[dict]:
     """
-    Stream TTS audio and collect WordBoundary events.
+    Stream TTS audio into store[name] and collect WordBoundary events.
     Uses clean_for_tts(text) to strip emoji before sending to edge_tts,
     so word-boundary events contain proper words instead of character spans.
+    Requests go through tts_scheduler (rate limit, backoff, circuit breaker).
     """
+    import edge_tts
     tts_text = clean_for_tts(text)
     if not tts_text:
         return []
-    word_timings = []
-    audio_bytes = bytearray()
 
-    for attempt in range(3):
+    async def attempt():
+        communicate = edge_tts.Communicate(tts_text, voice, boundary="WordBoundary")
+        word_timings = []
+        audio_bytes = bytearray()
+
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio_bytes.extend(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                # offset and duration are in 100-nanosecond units
+                offset_s = chunk["offset"] / 1e7
+                duration_s = chunk["duration"] / 1e7
+                word = chunk.get("text", "")
+                word_timings.append({
+                    "offset_s": offset_s,
+                    "duration_s": duration_s,
+                    "word": word,
+                })
+
+        if not audio_bytes:
+            raise ValueError("edge-tts returned no audio")
+        store.put(name, audio_bytes)
+        return word_timings
+
+    result = await tts_scheduler.run(attempt)
+    return result or []
+
+
+async def generate_tts_chunk(text: str, voice: str, store: "ScratchStore", name: str,
+                             fallback: bool = False) -> bool:
+    """
+    Generate a single TTS mp3 chunk (audio only) into store[name]. Returns True
+    on success. fallback: retry of a chunk whose word-timed request already
+    failed, so it does not count again towards the circuit breaker.
+    """
+    import edge_tts
+    tts_text = clean_for_tts(text)
+    if not tts_text:
+        return False
+
+    async def attempt():
+        communicate = edge_tts.Communicate(tts_text, voice)
+        audio_bytes = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio_bytes.extend(chunk["data"])
+        if not audio_bytes:
+            raise ValueError("edge-tts returned no audio")
+        store.put(name, audio_bytes)
+        return True
+
+    return bool(await tts_scheduler.run(attempt, breaker=not fallback))
+
+
+async def synthesize_chunk(text: str, voice: str, store: "ScratchStore", name: str,
+                           word_timings: bool = True):
+    """
+    Synthesize one chunk to store[name], with WordBoundary timings if
+    requested (falling back to plain TTS). Returns the timings list ([] when
+    not requested or unavailable), or None if no audio could be produced.
+    """
+    if word_timings:
+        timings = await generate_tts_with_word_timings(text, voice, store, name)
+        if store.size(name) > 0:
+            return timings
+    if await generate_tts_chunk(text, voice, store, name, fallback=word_timings):
+        return []
+    return None
+
+
+# ─────────────────────────── SUBTITLE SIDECARS ────────────────────────────────
+
+SIDECAR_FORMATS = ("vtt", "srt", "json")
+
+
+def append_cue(cues: list[dict], key, text: str, start: float, duration: float,
+               word_timings: list[dict]):
+    """
+    Add a timed TTS chunk to cues. Chunks with the same key (paragraph index)
+    extend the previous cue. word_timings offsets are relative to start.
+    """
+    words = [
+        {
+            "start": round(start + wt["offset_s"], 3),
+            "end": round(start + wt["offset_s"] + wt["duration_s"], 3),
+            "word": wt.get("text_word", wt["word"]),
+        }
+        for wt in word_timings
+    ]
+    end = round(start + duration, 3)
+    if cues and cues[-1]["key"] == key:
+        cue = cues[-1]
+        cue["end"] = end
+        cue["text"] += " " + text
+        cue["words"].extend(words)
+        cue["untimed"] = cue["untimed"] or not words
+    else:
+        cues.append({"key": key, "start": round(start, 3), "end": end, "text": text,
+                     "words": words, "untimed": not words})
+
+
+def _format_timestamp(seconds: float, decimal_sep: str = ".") -> str:
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    sec, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{sec:02d}{decimal_sep}{ms:03d}"
+
+
+def _escape_cue_text(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def write_webvtt(cues: list[dict], path: str):
+    """
+    WebVTT with one cue per paragraph and inline <hh:mm:ss.mmm> word timestamps,
+    which players render as karaoke-style progressive highlighting.
+    """
+    out = ["WEBVTT", ""]
+    for n, cue in enumerate(cues, 1):
+        out.append(str(n))
+        out.append(f"{_format_timestamp(cue['start'])} --> {_format_timestamp(cue['end'])}")
+        if not cue["untimed"]:
+            parts = []
+            for idx, w in enumerate(cue["words"]):
+                word = _escape_cue_text(w["word"])
+                if idx == 0 or w["start"] <= cue["start"]:
+                    parts.append(word)
+                else:
+                    parts.append(f"<{_format_timestamp(w['start'])}>{word}")
+            out.append(" ".join(parts))
+        else:
+            out.append(_escape_cue_text(cue["text"]))
+        out.append("")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+
+def write_srt(cues: list[dict], path: str):
+    """SubRip with one cue per paragraph (SRT has no word-level timing)."""
+    out = []
+    for n, cue in enumerate(cues, 1):
+        out.append(str(n))
+        out.append(f"{_format_timestamp(cue['start'], ',')} --> {_format_timestamp(cue['end'], ',')}")
+        out.append(cue["text"])
+        out.append("")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+
+def write_timing_json(cues: list[dict], path: str):
+    """JSON with paragraph and word timestamps in seconds."""
+    import json
+    data = {
+        "paragraphs": [
+            {"start": c["start"], "end": c["end"], "text": c["text"], "words": c["words"]}
+            for c in cues
+        ]
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def write_sidecars(cues: list[dict], output_path: str, formats=SIDECAR_FORMATS) -> list[str]:
+    """Write the requested sidecar formats next to output_path; returns the written paths."""
+    writers = {"vtt": write_webvtt, "srt": write_srt, "json": write_timing_json}
+    base = os.path.splitext(output_path)[0]
+    written = []
+    for fmt in formats:
+        path = f"{base}.{fmt}"
+        writers[fmt](cues, path)
+        written.append(path)
+    return written
+
+
+# ─────────────────────────── BACKGROUND JOBS ──────────────────────────────────
+
+# Upper bound on UI refreshes per second coming from a running conversion
+PROGRESS_MAX_UPDATES_PER_SEC = 5
+
+
+class ConversionCancelled(Exception):
+    """Raised inside a conversion when the user cancels it."""
+
+
+class JobControl:
+    """
+    Cancel / pause flags shared between the UI thread and a conversion worker.
+    Conversions poll them between chunks and frames via job_checkpoint().
+    """
+
+    def __init__(self):
+        self._cancel = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._running.set()  # wake a paused worker so it can exit
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def check(self):
+        """Blocking checkpoint for plain worker threads (e.g. the MoviePy writer)."""
+        self._running.wait()
+        if self._cancel.is_set():
+            raise ConversionCancelled()
+
+
+async def job_checkpoint(control: JobControl = None):
+    """Yield to the event loop, wait while paused and raise if cancelled."""
+    await asyncio.sleep(0)
+    if control is None:
+        return
+    while control.paused and not control.cancelled:
+        await asyncio.sleep(0.1)
+    if control.cancelled:
+        raise ConversionCancelled()
+
+
+class ThrottledProgress:
+    """
+    Wrap a progress callback so it fires at most max_per_sec times per second.
+    The final update (current >= total, when total is known) is always delivered.
+    """
+
+    def __init__(self, callback, max_per_sec: float = PROGRESS_MAX_UPDATES_PER_SEC):
+        self.callback = callback
+        self.min_interval = 1.0 / max_per_sec
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, current, total, *args):
+        now = time.monotonic()
+        with self._lock:
+            if (not total or current < total) and now - self._last < self.min_interval:
+                return
+            self._last = now
+        self.callback(current, total, *args)
+
+
+def run_in_worker(coro_fn, *args, **kwargs):
+    """
+    Run coro_fn(*args, **kwargs) on a fresh event loop in a dedicated daemon
+    thread. Returns a concurrent.futures.Future (await it with asyncio.wrap_future).
+    """
+    from concurrent.futures import Future
+
+    fut = Future()
+
+    def _target():
+        if not fut.set_running_or_notify_cancel():
+            return
         try:
-            communicate = edge_tts.Communicate(tts_text, voice, boundary="WordBoundary")
-            word_timings.clear()
-            audio_bytes.clear()
-
-            async for chunk in communicate.stream():
-                if chunk["type"] == "audio":
-                    audio_bytes.extend(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    # offset and duration are in 100-nanosecond units
-                    offset_s = chunk["offset"] / 1e7
-                    duration_s = chunk["duration"] / 1e7
-                    word = chunk.get("text", "")
-                    word_timings.append({
-                        "offset_s": offset_s,
-                        "duration_s": duration_s,
-                        "word": word,
-                    })
-
-            if audio_bytes:
-                with open(out_path, "wb") as f:
-                    f.write(audio_bytes)
-                return word_timings
+            fut.set_result(asyncio.run(coro_fn(*args, **kwargs)))
+        except BaseException as ex:
+            fut.set_exception(ex)
+        finally:
+            set_job_stage(None)
 
-        except Exception:
-            await asyncio.sleep(0.5)
+    threading.Thread(target=_target, name="spyken-worker", daemon=True).start()
+    return fut
 
-    return []
 
+# ─────────────────────────── JOB PROFILING ────────────────────────────────────
 
-async def generate_tts_chunk(text: str, voice: str, out_path: str) -> bool:
-    """Generate a single TTS mp3 chunk (audio only). Returns True on success."""
-    tts_text = clean_for_tts(text)
-    if not tts_text:
+PROFILING_MODES = ("sample", "cprofile")
+
+# Default profiling mode for GUI jobs (None = off); set by the --profiling option
+DEFAULT_PROFILING_MODE = os.environ.get("SPYKEN_PROFILING") or None
+
+_job_stages = {}  # thread id -> current pipeline stage, read by JobProfiler
+
+
+def set_job_stage(stage: str = None):
+    """
+    Tag the calling thread's current work (extract, tts, align, render,
+    encode, mux) so profiler samples can be grouped by stage; None clears it.
+    """
+    if stage is None:
+        _job_stages.pop(threading.get_ident(), None)
+    else:
+        _job_stages[threading.get_ident()] = stage
+
+
+def call_in_stage(stage: str, fn, *args, **kwargs):
+    """
+    Call fn tagged with stage, clearing the tag afterwards; use it for work
+    handed to asyncio.to_thread, whose pool threads are reused.
+    """
+    set_job_stage(stage)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        set_job_stage(None)
+
+
+class JobProfiler:
+    """
+    Opt-in profiler wrapping one conversion job (use as a context manager in
+    the job's thread).
+
+    - "sample": a background thread samples the stacks of the job thread and
+      of any thread tagged with set_job_stage() every `interval` seconds and
+      writes <output>.collapsed, one "stage;outer;...;inner count" line per
+      stack, ready for flamegraph.pl, speedscope or inferno.
+    - "cprofile": deterministic cProfile of the job thread, written to
+      <output>.pstats (threads started by the job, e.g. the encoder, are not seen).
+    """
+
+    def __init__(self, output_path: str, mode: str = "sample", interval: float = 0.005):
+        if mode not in PROFILING_MODES:
+            raise ValueError(f"Άγνωστη λειτουργία profiling: {mode}")
+        self.mode = mode
+        self.interval = interval
+        base = os.path.splitext(output_path)[0]
+        self.report_path = base + (".collapsed" if mode == "sample" else ".pstats")
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._profile = None
+        self._counts = {}
+        self._labels = {}  # code object -> frame label
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        if self.mode == "cprofile":
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = threading.Thread(target=self._sample_loop, name="spyken-profiler", daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.report_path)
+        else:
+            self._stop.set()
+            self._sampler.join()
+            self._write_collapsed()
+        set_job_stage(None)
         return False
-    for attempt in range(3):
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _sample_loop(self):
+        import sys
+
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            thread_ids = set(_job_stages)
+            thread_ids.add(self._thread_id)
+            for tid in thread_ids:
+                frame = frames.get(tid)
+                if frame is None:
+                    _job_stages.pop(tid, None)  # thread has ended
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(_job_stages.get(tid, "other"))
+                key = ";".join(reversed(stack))
+                self._counts[key] = self._counts.get(key, 0) + 1
+
+    def _write_collapsed(self):
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            for key, count in sorted(self._counts.items()):
+                f.write(f"{key} {count}\n")
+
+
+def profiling_job(output_path: str, mode: str = None):
+    """JobProfiler for mode, or a no-op context when profiling is off."""
+    import contextlib
+    if not mode:
+        return contextlib.nullcontext()
+    return JobProfiler(output_path, mode)
+
+
+# ─────────────────────────── MEMORY GOVERNOR ──────────────────────────────────
+
+# Memory budget of the process during a video job (MB); SPYKEN_MEMORY_MB or --memory-mb
+MEMORY_BUDGET_MB = int(os.environ.get("SPYKEN_MEMORY_MB", "2048"))
+MEMORY_HIGH_WATER = 0.8  # spill finished clips once this fraction of the budget is used
+MEMORY_MIN_SPILL_MB = 64  # RSS pressure alone does not spill smaller batches
+
+
+def get_rss_bytes():
+    """Resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                    "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")]
+
         try:
-            communicate = edge_tts.Communicate(tts_text, voice)
-            await communicate.save(out_path)
-            if os.path.exists(out_path) and os.path.getsize(out_path) > 0:
-                return True
-        except Exception:
-            await asyncio.sleep(0.5)
-    return False
+            kernel32 = ctypes.WinDLL("kernel32")
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            kernel32.K32GetProcessMemoryInfo.argtypes = [
+                wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            if kernel32.K32GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                                ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        except (OSError, AttributeError):
+            pass
+    return None
+
+
+class MemoryGovernor:
+    """
+    Memory budget of one video job.
+
+    The renderer reports every frame it hands to a clip (track); until the
+    clips are encoded those frames stay in RAM. Frames shared by several
+    clips (DOCX base frames) count once. pressure() is checked after every
+    frame: once the tracked frames or the process RSS reach the high-water
+    mark, the pipeline stops producing (no TTS, no rendering) and spills its
+    pending clips to a video-only segment on disk, then calls released().
+    A budget of 0 disables spilling.
+    """
+
+    def __init__(self, budget_mb: int = None, high_water: float = MEMORY_HIGH_WATER):
+        budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+        self.limit = int(budget_mb * 1024 * 1024 * high_water)
+        self.min_spill = MEMORY_MIN_SPILL_MB * 1024 * 1024
+        self.frame_bytes = 0  # frames held by clips that are not encoded yet
+        self._tracked = set()  # ids of those frames; the clips keep them alive
+        self.spills = 0
+        self.peak_rss = 0
+
+    def track(self, frame):
+        """Account for a frame (NumPy array) now referenced by a pending clip."""
+        if id(frame) not in self._tracked:
+            self._tracked.add(id(frame))
+            self.frame_bytes += frame.nbytes
+
+    def pressure(self) -> bool:
+        """True when the pending clips should be spilled before producing more."""
+        if self.limit <= 0 or not self.frame_bytes:
+            return False
+        if self.frame_bytes >= self.limit:
+            return True
+        rss = get_rss_bytes()
+        if rss is None:
+            return False
+        self.peak_rss = max(self.peak_rss, rss)
+        return rss >= self.limit and self.frame_bytes >= self.min_spill
+
+    def released(self):
+        """The pending clips were encoded and closed."""
+        import gc
+        self.frame_bytes = 0
+        self._tracked.clear()
+        self.spills += 1
+        gc.collect()  # MoviePy clips keep reference cycles; return the frames now
+
+
+# ─────────────────────────── SCRATCH STORE ────────────────────────────────────
+
+# In-memory share of a job's intermediates (MB); SPYKEN_SCRATCH_MB
+SCRATCH_LIMIT_MB = int(os.environ.get("SPYKEN_SCRATCH_MB", "256"))
+
+
+class ScratchStore:
+    """
+    Named intermediates of one job (TTS chunks, silence, video segments).
+
+    put() keeps the bytes in memory while the store holds less than
+    limit_mb; beyond that entries are written to files in a temporary
+    directory created on first use. view() gives a memoryview of an entry
+    (no copy for the in-memory ones), path() a real file for ffmpeg/moviepy,
+    writing an in-memory entry out once if needed. new_path() reserves a
+    file for a tool that writes it itself. close() drops everything.
+
+    With directory set, files go there and are left in place by close()
+    (shared job directories); limit_mb=0 sends every entry to disk.
+    """
+
+    def __init__(self, limit_mb: int = None, directory: str = None):
+        limit_mb = SCRATCH_LIMIT_MB if limit_mb is None else limit_mb
+        self.limit = int(limit_mb * 1024 * 1024)
+        self._dir = directory
+        self._own_dir = directory is None
+        self._mem = {}    # name -> bytes
+        self._files = {}  # name -> path
+        self._used = 0
+        self._lock = threading.Lock()
+        self.spilled = 0  # entries that went to disk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def directory(self) -> str:
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="spyken-")
+        return self._dir
+
+    def put(self, name: str, data) -> str:
+        """Store data (bytes-like) under name, replacing any previous entry; returns name."""
+        data = bytes(data)
+        self.discard(name)
+        with self._lock:
+            if self._used + len(data) <= self.limit:
+                self._mem[name] = data
+                self._used += len(data)
+                return name
+        path = self._write_file(name, data)
+        with self._lock:
+            self._files[name] = path
+            self.spilled += 1
+        return name
+
+    def _write_file(self, name: str, data) -> str:
+        """
+        Write data to the entry's file under a unique temporary name, then
+        move it into place: in a shared directory another worker that took
+        over the same unit may write the same entry concurrently.
+        """
+        path = os.path.join(self.directory, name)
+        fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return path
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._mem or name in self._files
+
+    def size(self, name: str) -> int:
+        """Size of an entry in bytes (0 if missing)."""
+        data = self._mem.get(name)
+        if data is not None:
+            return len(data)
+        path = self._files.get(name)
+        return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+    def view(self, name: str) -> memoryview:
+        """Contents of an entry; in-memory entries are not copied."""
+        data = self._mem.get(name)
+        if data is None:
+            with open(self._files[name], "rb") as f:
+                data = f.read()
+        return memoryview(data)
+
+    def path(self, name: str) -> str:
+        """A file holding the entry; in-memory entries move to disk for good."""
+        with self._lock:
+            data = self._mem.pop(name, None)
+            if data is not None:
+                self._used -= len(data)
+        if data is not None:
+            self._files[name] = self._write_file(name, data)
+        return self._files[name]
+
+    def new_path(self, name: str) -> str:
+        """Reserve a file entry for an external writer (ffmpeg, moviepy) and return its path."""
+        self.discard(name)
+        path = os.path.join(self.directory, name)
+        self._files[name] = path
+        return path
+
+    def adopt(self, name: str) -> str:
+        """Register a file another process wrote as name in the store directory; returns name."""
+        self._files[name] = os.path.join(self.directory, name)
+        return name
+
+    def discard(self, name: str):
+        with self._lock:
+            data = self._mem.pop(name, None)
+            if data is not None:
+                self._used -= len(data)
+            path = self._files.pop(name, None)
+        if path and self._own_dir:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._mem.clear()
+            self._files.clear()
+            self._used = 0
+        if self._own_dir and self._dir is not None:
+            import shutil
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
 
 
 # ─────────────────────────── VIDEO HELPERS ────────────────────────────────────
@@ -226,6 +1340,7 @@ def extract_paragraphs_pdf_with_pos(filepath: str) -> list[tuple]:
     """
     Returns list of (text, page_idx, fitz.Rect) for each valid paragraph.
     """
+    import fitz  # PyMuPDF
     results = []
     doc = fitz.open(filepath)
     for page_idx, page in enumerate(doc):
@@ -238,11 +1353,12 @@ def extract_paragraphs_pdf_with_pos(filepath: str) -> list[tuple]:
     return results
 
 
-def get_pdf_word_rects(pdf_doc, page_idx: int, para_rect: fitz.Rect) -> list[tuple]:
+def get_pdf_word_rects(pdf_doc, page_idx: int, para_rect) -> list[tuple]:
     """
     Return list of (word_text, fitz.Rect) for words within para_rect on page_idx.
     Uses fitz word-level extraction.
     """
+    import fitz  # PyMuPDF
     page = pdf_doc[page_idx]
     # get_text("words") returns (x0, y0, x1, y1, "word", block_no, line_no, word_no)
     words = page.get_text("words")
@@ -259,6 +1375,37 @@ def get_pdf_word_rects(pdf_doc, page_idx: int, para_rect: fitz.Rect) -> list[tup
     return result
 
 
+def match_pdf_word_rects(words: list[str], pdf_word_rects: list[tuple]) -> list:
+    """
+    Map each spoken word (in order) to its fitz.Rect from get_pdf_word_rects,
+    using a sequential pointer with a small look-ahead window.
+    Returns a list parallel to words with a Rect or None when no match was found.
+    """
+    strip_chars = ".,;:!?\"'()[]\u00bb\u00ab\u2014\u2013-"
+    result = []
+    wr_ptr = 0
+    for word_text in words:
+        norm_word = word_text.strip(strip_chars).lower()
+        matching_rect = None
+        search_limit = min(wr_ptr + 20, len(pdf_word_rects))
+        for j in range(wr_ptr, search_limit):
+            wr_text, wr_rect = pdf_word_rects[j]
+            wr_norm = wr_text.strip(strip_chars).lower()
+            if wr_norm == norm_word or (
+                wr_norm and norm_word and
+                (norm_word in wr_norm or wr_norm in norm_word)
+            ):
+                matching_rect = wr_rect
+                wr_ptr = j + 1  # advance past this word
+                break
+        else:
+            # No match found — advance ptr by 1 to avoid stalling
+            if wr_ptr < len(pdf_word_rects):
+                wr_ptr += 1
+        result.append(matching_rect)
+    return result
+
+
 def render_page_pdf_image(
     pdf_doc,
     page_idx: int,
@@ -273,6 +1420,7 @@ def render_page_pdf_image(
     - word_highlight_rect: word-level bright highlight (fitz.Rect), drawn on top
     Returns a PIL Image (RGB).
     """
+    import fitz  # PyMuPDF
     from PIL import Image, ImageDraw
 
     page = pdf_doc[page_idx]
@@ -318,19 +1466,28 @@ def render_page_pdf_image(
     return canvas
 
 
-def _build_docx_layout(text: str, box_w: int, box_h: int):
+@functools.lru_cache(maxsize=64)
+def _load_font(size: int):
+    """Return (font, actual_size): arial at size, or PIL's default font (size 14)."""
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype("arial.ttf", size=size), size
+    except Exception:
+        return ImageFont.load_default(), 14
+
+
+def _text_width(font, text: str) -> int:
+    return font.getbbox(text)[2] if hasattr(font, 'getbbox') else font.getsize(text)[0]
+
+
+def _build_docx_layout(text: str, box_w: int, box_h: int, ui: float = 1.0):
     """
     Compute line wrapping and best font size for DOCX renderer.
+    ui scales the 720p font size range for other output resolutions.
     Returns (best_lines, best_font, line_h, font_size).
     """
-    from PIL import ImageFont
-
     def try_wrap(font_sz):
-        try:
-            font = ImageFont.truetype("arial.ttf", size=font_sz)
-        except Exception:
-            font = ImageFont.load_default()
-            font_sz = 14
+        font, font_sz = _load_font(font_sz)
 
         words = text.split()
         if not words:
@@ -340,7 +1497,7 @@ def _build_docx_layout(text: str, box_w: int, box_h: int):
         current_line = []
         for word in words:
             test_line = " ".join(current_line + [word])
-            w = font.getbbox(test_line)[2] if hasattr(font, 'getbbox') else font.getsize(test_line)[0]
+            w = _text_width(font, test_line)
             if w <= box_w:
                 current_line.append(word)
             else:
@@ -355,17 +1512,20 @@ def _build_docx_layout(text: str, box_w: int, box_h: int):
 
         return lines, font, font_sz
 
+    max_size = max(10, int(50 * ui))
+    min_size = max(8, int(16 * ui))
+
     best_lines = []
     best_font = None
-    best_font_size = 50
-    line_h = 50
+    best_font_size = max_size
+    line_h = max_size
 
-    for f_size in range(50, 15, -2):
+    for f_size in range(max_size, min_size - 1, -2):
         lines, font, actual_f_size = try_wrap(f_size)
-        test_line_h = max(22, int(actual_f_size * 1.5))
+        test_line_h = max(int(22 * ui), int(actual_f_size * 1.5))
         total_h = len(lines) * test_line_h
 
-        if total_h <= box_h or f_size == 16:
+        if total_h <= box_h or f_size <= min_size + 1:
             best_lines = lines
             best_font = font
             best_font_size = actual_f_size
@@ -373,153 +1533,634 @@ def _build_docx_layout(text: str, box_w: int, box_h: int):
             break
 
     if not best_lines:
-        best_lines, best_font, best_font_size = try_wrap(24)
-        line_h = 36
+        best_lines, best_font, best_font_size = try_wrap(max(8, int(24 * ui)))
+        line_h = max(12, int(36 * ui))
 
     return best_lines, best_font, line_h, best_font_size
 
 
-def render_docx_paragraph_image(
-    text: str,
-    para_idx: int,
-    total: int,
-    highlight_word: str = None,
-    target_w: int = VIDEO_W,
-    target_h: int = VIDEO_H,
-):
-    """
-    Render a DOCX paragraph as a PIL Image.
-    - If highlight_word is given, that specific word (first occurrence on screen) is
-      highlighted in bright fluorescent green; the rest of the text box has a dimmer backdrop.
-    - Otherwise falls back to the full-paragraph highlight.
-    Returns a PIL Image (RGB).
-    """
-    from PIL import Image, ImageDraw, ImageFont
+# DOCX frame colours
+DOCX_BG = (24, 28, 42)
+DOCX_HEADER_BG = (40, 44, 64)
+DOCX_HEADER_COLOR = (180, 180, 200)
+DOCX_FOOTER_COLOR = (100, 100, 130)
+DOCX_TEXT_COLOR = (30, 30, 30)
+DOCX_DIM_TEXT_COLOR = (200, 220, 200)
 
-    BG = (24, 28, 42)
-    HEADER_BG = (40, 44, 64)
-    H_COLOR = HIGHLIGHT_COLOR          # (57, 255, 20)
-    TEXT_COLOR = (30, 30, 30)
-    HEADER_COLOR = (180, 180, 200)
 
-    canvas = Image.new("RGB", (target_w, target_h), BG)
-    draw = ImageDraw.Draw(canvas)
+def _normalize_word(w: str) -> str:
+    """Strip punctuation and lowercase, for matching spoken words to visible ones."""
+    return w.strip(".,;:!?\"'()[]»«—–-").lower() if w else ""
 
-    # Header bar
-    draw.rectangle([0, 0, target_w, 60], fill=HEADER_BG)
-    header_txt = f"Παράγραφος {para_idx + 1} / {total}"
-    try:
-        header_font = ImageFont.truetype("arial.ttf", size=24)
-        draw.text((target_w // 2, 30), header_txt, font=header_font, fill=HEADER_COLOR, anchor="mm")
-    except Exception:
-        draw.text((target_w // 2, 30), header_txt, fill=HEADER_COLOR, anchor="mm")
+
+def _layout_docx_paragraph(text: str, target_w: int, target_h: int) -> dict:
+    """
+    Geometry of a DOCX paragraph frame: font, line height, the text block
+    rectangle and the position of every visible word as (word, x, y, width).
+    Shared by the PIL renderer and the WordAtlas renderer.
+    """
+    # Fixed pixel sizes below are designed for 720p; scale them per profile
+    ui = target_h / VIDEO_H
+
+    def px(v):
+        return max(1, int(round(v * ui)))
 
     # Layout dimensions
-    box_w = target_w - 120
-    box_h = target_h - 160
-    box_x = 60
-    box_y = 90
+    box_w = target_w - px(120)
+    box_h = target_h - px(160)
+    box_x = px(60)
+    box_y = px(90)
 
-    best_lines, best_font, line_h, font_size = _build_docx_layout(text, box_w, box_h)
+    best_lines, best_font, line_h, font_size = _build_docx_layout(text, box_w, box_h, ui)
 
     # Compute overall text block dimensions
-    text_block_h = len(best_lines) * line_h + 40
+    text_block_h = len(best_lines) * line_h + px(40)
     max_line_w = 0
     for line in best_lines:
-        w = best_font.getbbox(line)[2] if hasattr(best_font, 'getbbox') else best_font.getsize(line)[0]
-        max_line_w = max(max_line_w, w)
-    text_block_w = min(max_line_w + 40, box_w + 40)
+        max_line_w = max(max_line_w, _text_width(best_font, line))
+    text_block_w = min(max_line_w + px(40), box_w + px(40))
 
-    tx = box_x - 20
-    ty = box_y - 10
-
-    if highlight_word:
-        # Draw a dim backdrop for the whole paragraph box
-        draw.rectangle([tx, ty, tx + text_block_w, ty + text_block_h],
-                       fill=(30, 80, 30))
-        draw.rectangle([tx, ty, tx + text_block_w, ty + text_block_h],
-                       outline=(0, 120, 0), width=2)
-    else:
-        # Full bright highlight (original behaviour)
-        draw.rectangle([tx, ty, tx + text_block_w, ty + text_block_h], fill=H_COLOR)
-        draw.rectangle([tx, ty, tx + text_block_w, ty + text_block_h], outline=(0, 200, 0), width=4)
-
-    # Draw text lines and find word bounding box
-    y_cursor = box_y + 10
-    word_rect_found = None  # (x0, y0, x1, y1) on canvas
-
-    # Normalize highlight_word for comparison (strip punctuation)
-    def normalize(w):
-        return w.strip(".,;:!?\"'()[]»«—–-").lower() if w else ""
-
-    norm_hw = normalize(highlight_word)
-    word_found = False
+    tx = box_x - px(20)
+    ty = box_y - px(10)
 
+    # Word positions; the space width is the same for every word
+    space_w = _text_width(best_font, " ")
+    words = []
+    y_cursor = box_y + px(10)
     for line in best_lines:
-        line_words = line.split()
-        x_cursor = box_x + 10
-
-        for lw in line_words:
-            # Measure this word
+        x_cursor = box_x + px(10)
+        for lw in line.split():
             if hasattr(best_font, 'getbbox'):
                 wb = best_font.getbbox(lw)
                 w_width = wb[2] - wb[0]
-                w_height = wb[3] - wb[1]
-            else:
-                w_width, w_height = best_font.getsize(lw)
-                wb = (0, 0, w_width, w_height)
-
-            # Draw the word
-            if highlight_word and not word_found and normalize(lw) == norm_hw:
-                # Highlight this word
-                pad = 4
-                hx0 = x_cursor - pad
-                hy0 = y_cursor - pad
-                hx1 = x_cursor + w_width + pad
-                hy1 = y_cursor + line_h - 2
-                draw.rectangle([hx0, hy0, hx1, hy1], fill=H_COLOR)
-                draw.rectangle([hx0, hy0, hx1, hy1], outline=(0, 220, 0), width=2)
-                draw.text((x_cursor, y_cursor), lw, font=best_font, fill=TEXT_COLOR)
-                word_found = True
             else:
-                # Normal text (white-ish on dark backdrop when word mode)
-                txt_col = (200, 220, 200) if highlight_word else TEXT_COLOR
-                draw.text((x_cursor, y_cursor), lw, font=best_font, fill=txt_col)
-
+                w_width = best_font.getsize(lw)[0]
+            words.append((lw, x_cursor, y_cursor, w_width))
             # Advance x by word width + space width
-            if hasattr(best_font, 'getbbox'):
-                space_w = best_font.getbbox(" ")[2]
-            else:
-                space_w = best_font.getsize(" ")[0]
             x_cursor += w_width + space_w
 
         y_cursor += line_h
         if y_cursor > box_y + box_h:
             break
 
-    # Footer
-    draw.rectangle([0, target_h - 40, target_w, target_h], fill=HEADER_BG)
-    footer_txt = "Spyken · MP4 by spyalekos"
+    return {
+        "px": px,
+        "font": best_font,
+        "line_h": line_h,
+        "block": (tx, ty, tx + text_block_w, ty + text_block_h),
+        "words": words,
+    }
+
+
+def _draw_centered_text(draw, xy: tuple, text: str, font, fill):
+    """
+    Draw text centred on xy. Bitmap fallback fonts reject anchors (and
+    non-Latin text), so fall back to PIL's default font without an anchor,
+    and finally skip the text: header and footer are decoration only.
+    """
     try:
-        footer_font = ImageFont.truetype("arial.ttf", size=18)
-        draw.text((target_w // 2, target_h - 20), footer_txt,
-                  font=footer_font, fill=(100, 100, 130), anchor="mm")
+        draw.text(xy, text, font=font, fill=fill, anchor="mm")
     except Exception:
-        draw.text((target_w // 2, target_h - 20), footer_txt, fill=(100, 100, 130), anchor="mm")
+        try:
+            draw.text(xy, text, fill=fill)
+        except Exception:
+            pass
+
+
+def _draw_docx_chrome(draw, layout: dict, para_idx: int, total: int,
+                      target_w: int, target_h: int, word_mode: bool):
+    """Draw header, footer and the paragraph backdrop (everything except the words)."""
+    px = layout["px"]
+
+    # Header bar
+    draw.rectangle([0, 0, target_w, px(60)], fill=DOCX_HEADER_BG)
+    header_txt = f"Παράγραφος {para_idx + 1} / {total}"
+    header_font, _ = _load_font(px(24))
+    _draw_centered_text(draw, (target_w // 2, px(30)), header_txt, header_font, DOCX_HEADER_COLOR)
+
+    if word_mode:
+        # Draw a dim backdrop for the whole paragraph box
+        draw.rectangle(layout["block"], fill=(30, 80, 30))
+        draw.rectangle(layout["block"], outline=(0, 120, 0), width=2)
+    else:
+        # Full bright highlight (original behaviour)
+        draw.rectangle(layout["block"], fill=HIGHLIGHT_COLOR)
+        draw.rectangle(layout["block"], outline=(0, 200, 0), width=4)
+
+    # Footer
+    draw.rectangle([0, target_h - px(40), target_w, target_h], fill=DOCX_HEADER_BG)
+    footer_txt = "Spyken · MP4 by spyalekos"
+    footer_font, _ = _load_font(px(18))
+    _draw_centered_text(draw, (target_w // 2, target_h - px(20)), footer_txt, footer_font, DOCX_FOOTER_COLOR)
+
+
+def _docx_word_highlight_box(layout: dict, word_idx: int) -> tuple:
+    """Canvas rectangle (x0, y0, x1, y1) of the highlight behind a word."""
+    _, x, y, w_width = layout["words"][word_idx]
+    pad = layout["px"](4)
+    return (x - pad, y - pad, x + w_width + pad, y + layout["line_h"] - 2)
+
+
+def _find_docx_word(layout: dict, highlight_word: str):
+    """Index of the first visible word matching highlight_word, or None."""
+    norm_hw = _normalize_word(highlight_word)
+    for idx, (lw, _, _, _) in enumerate(layout["words"]):
+        if _normalize_word(lw) == norm_hw:
+            return idx
+    return None
+
+
+def render_docx_paragraph_image(
+    text: str,
+    para_idx: int,
+    total: int,
+    highlight_word: str = None,
+    target_w: int = VIDEO_W,
+    target_h: int = VIDEO_H,
+):
+    """
+    Render a DOCX paragraph as a PIL Image.
+    - If highlight_word is given, that specific word (first occurrence on screen) is
+      highlighted in bright fluorescent green; the rest of the text box has a dimmer backdrop.
+    - Otherwise falls back to the full-paragraph highlight.
+    Returns a PIL Image (RGB).
+    """
+    from PIL import Image, ImageDraw
+
+    canvas = Image.new("RGB", (target_w, target_h), DOCX_BG)
+    draw = ImageDraw.Draw(canvas)
+
+    layout = _layout_docx_paragraph(text, target_w, target_h)
+    _draw_docx_chrome(draw, layout, para_idx, total, target_w, target_h, bool(highlight_word))
+
+    hl_idx = _find_docx_word(layout, highlight_word) if highlight_word else None
+    font = layout["font"]
+    for idx, (lw, x, y, _) in enumerate(layout["words"]):
+        if idx == hl_idx:
+            box = _docx_word_highlight_box(layout, idx)
+            draw.rectangle(box, fill=HIGHLIGHT_COLOR)
+            draw.rectangle(box, outline=(0, 220, 0), width=2)
+            draw.text((x, y), lw, font=font, fill=DOCX_TEXT_COLOR)
+        else:
+            # Normal text (white-ish on dark backdrop when word mode)
+            txt_col = DOCX_DIM_TEXT_COLOR if highlight_word else DOCX_TEXT_COLOR
+            draw.text((x, y), lw, font=font, fill=txt_col)
 
     return canvas
 
 
-def get_mp3_duration(path: str) -> float:
-    """Return duration of an mp3 file in seconds."""
+# ─────────────────────────── DOCX WORD ATLAS ──────────────────────────────────
+
+class WordAtlas:
+    """
+    Per-job cache for the DOCX renderer.
+
+    Every distinct (font, size, token) is rasterized once into an 8-bit
+    coverage mask; frames are assembled by alpha-blending cached masks into a
+    NumPy frame buffer in the wanted colour, so text rendering becomes memory
+    copies instead of FreeType calls. Paragraph layouts and their two base
+    frames (dim word-mode backdrop / full highlight) are cached as well, so a
+    word frame is one base copy, one rectangle fill and one blit.
+    """
+
+    def __init__(self, max_masks: int = 50000, max_paragraphs: int = 4):
+        self.max_masks = max_masks
+        self.max_paragraphs = max_paragraphs
+        self._masks = {}       # (font key, token) -> (mask, dx, dy)
+        self._fonts = {}       # id(font) -> font, keeps ids stable for the cache keys
+        self._paragraphs = {}  # (text, para_idx, total, w, h) -> (layout, base_dim, base_full)
+
+    def clear(self):
+        """Drop every cached mask and paragraph (frames already handed out stay valid)."""
+        self._masks.clear()
+        self._fonts.clear()
+        self._paragraphs.clear()
+
+    def _font_key(self, font):
+        path = getattr(font, "path", None)
+        if isinstance(path, str):
+            return (path, getattr(font, "size", None))
+        self._fonts[id(font)] = font
+        return (id(font),)
+
+    def mask(self, font, token: str):
+        """Return (mask uint8 HxW, dx, dy): glyph coverage of token and its offset from the text origin."""
+        key = (self._font_key(font), token)
+        hit = self._masks.get(key)
+        if hit is not None:
+            return hit
+
+        import numpy as np
+        from PIL import Image, ImageDraw
+
+        l, t, r, b = font.getbbox(token)
+        img = Image.new("L", (max(1, r - l), max(1, b - t)), 0)
+        ImageDraw.Draw(img).text((-l, -t), token, font=font, fill=255)
+        entry = (np.asarray(img, dtype=np.uint8), l, t)
+
+        if len(self._masks) >= self.max_masks:
+            self._masks.clear()
+        self._masks[key] = entry
+        return entry
+
+    def blit(self, frame, font, token: str, x: int, y: int, color: tuple, clip: tuple = None):
+        """
+        Alpha-blend token in color into frame (HxWx3 uint8) with its text origin
+        at (x, y), optionally restricted to the inclusive clip box (x0, y0, x1, y1).
+        """
+        import numpy as np
+
+        mask, dx, dy = self.mask(font, token)
+        x0, y0 = x + dx, y + dy
+        h, w = mask.shape
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + w, frame.shape[1]), min(y0 + h, frame.shape[0])
+        if clip is not None:
+            fx0, fy0 = max(fx0, clip[0]), max(fy0, clip[1])
+            fx1, fy1 = min(fx1, clip[2] + 1), min(fy1, clip[3] + 1)
+        if fx0 >= fx1 or fy0 >= fy1:
+            return
+        a = mask[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0, None].astype(np.uint16)
+        region = frame[fy0:fy1, fx0:fx1]
+        col = np.asarray(color, dtype=np.uint16)
+        region[:] = ((region * (255 - a) + col * a + 127) // 255).astype(np.uint8)
+
+    @staticmethod
+    def fill_rect(frame, box: tuple, fill: tuple, outline: tuple = None, width: int = 0):
+        """Fill an inclusive (x0, y0, x1, y1) rectangle like ImageDraw.rectangle."""
+        x0, y0, x1, y1 = box
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, frame.shape[1] - 1), min(y1, frame.shape[0] - 1)
+        if x0 > x1 or y0 > y1:
+            return
+        if outline is not None and width > 0:
+            frame[y0:y1 + 1, x0:x1 + 1] = outline
+            x0, y0, x1, y1 = x0 + width, y0 + width, x1 - width, y1 - width
+            if x0 > x1 or y0 > y1:
+                return
+        frame[y0:y1 + 1, x0:x1 + 1] = fill
+
+    def paragraph(self, text: str, para_idx: int, total: int, target_w: int, target_h: int):
+        """Return (layout, base_dim, base_full) for a paragraph, building it on first use."""
+        key = (text, para_idx, total, target_w, target_h)
+        hit = self._paragraphs.get(key)
+        if hit is not None:
+            return hit
+
+        import numpy as np
+        from PIL import Image, ImageDraw
+
+        layout = _layout_docx_paragraph(text, target_w, target_h)
+        bases = []
+        for word_mode in (True, False):
+            canvas = Image.new("RGB", (target_w, target_h), DOCX_BG)
+            _draw_docx_chrome(ImageDraw.Draw(canvas), layout, para_idx, total,
+                              target_w, target_h, word_mode)
+            frame = np.array(canvas)
+            color = DOCX_DIM_TEXT_COLOR if word_mode else DOCX_TEXT_COLOR
+            for lw, x, y, _ in layout["words"]:
+                self.blit(frame, layout["font"], lw, x, y, color)
+            frame.flags.writeable = False  # shared between clips
+            bases.append(frame)
+
+        if len(self._paragraphs) >= self.max_paragraphs:
+            self._paragraphs.pop(next(iter(self._paragraphs)))
+        entry = (layout, bases[0], bases[1])
+        self._paragraphs[key] = entry
+        return entry
+
+
+def render_docx_paragraph_frame(
+    text: str,
+    para_idx: int,
+    total: int,
+    highlight_word: str = None,
+    target_w: int = VIDEO_W,
+    target_h: int = VIDEO_H,
+    atlas: WordAtlas = None,
+):
+    """
+    Same frame as render_docx_paragraph_image, as an RGB NumPy array.
+    With an atlas, text is blitted from cached word bitmaps instead of drawn.
+    """
+    import numpy as np
+
+    if atlas is None:
+        return np.array(render_docx_paragraph_image(
+            text, para_idx, total, highlight_word=highlight_word,
+            target_w=target_w, target_h=target_h,
+        ))
+
+    layout, base_dim, base_full = atlas.paragraph(text, para_idx, total, target_w, target_h)
+    if not highlight_word:
+        return base_full
+    hl_idx = _find_docx_word(layout, highlight_word)
+    if hl_idx is None:
+        return base_dim
+
+    frame = base_dim.copy()
+    box = _docx_word_highlight_box(layout, hl_idx)
+    atlas.fill_rect(frame, box, HIGHLIGHT_COLOR, outline=(0, 220, 0), width=2)
+    lw, x, y, _ = layout["words"][hl_idx]
+    atlas.blit(frame, layout["font"], lw, x, y, DOCX_TEXT_COLOR)
+    # Words drawn after the highlighted one may overlap its padding; redraw
+    # the overlapping part on top of the highlight
+    for lw, x, y, _ in layout["words"][hl_idx + 1:]:
+        if y > box[3]:
+            break
+        atlas.blit(frame, layout["font"], lw, x, y, DOCX_DIM_TEXT_COLOR, clip=box)
+    return frame
+
+
+def mp3_duration(data) -> float:
+    """
+    Return duration of mp3 data (bytes or memoryview) in seconds, counted from
+    its frame headers so it matches the position of the part inside an
+    assemble_mp3 output.
+    """
     try:
+        frames, fmt = scan_mp3_frames(data)
+        if frames:
+            return len(frames) * fmt["samples"] / fmt["sample_rate"]
+        import io
         from mutagen.mp3 import MP3
-        audio = MP3(path)
+        audio = MP3(io.BytesIO(data))
         return audio.info.length
     except Exception:
         return 3.0  # fallback
 
 
+# Hide the console window of ffmpeg subprocesses in the windowed build
+_SUBPROCESS_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# edge-tts output format ("audio-24khz-48kbitrate-mono-mp3"); silence padding
+# must match it so the joined MP3 stays a single homogeneous stream.
+TTS_SAMPLE_RATE = 24000
+TTS_BITRATE = "48k"
+
+
+def get_ffmpeg_exe() -> str:
+    """Return the ffmpeg binary bundled with imageio-ffmpeg."""
+    import imageio_ffmpeg
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args: list[str], input: bytes = None) -> bytes:
+    """
+    Run ffmpeg quietly with args, feeding input to its stdin; returns its
+    stdout (for "pipe:1" outputs). Raises RuntimeError with its stderr on failure.
+    """
+    cmd = [get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y"] + args
+    proc = subprocess.run(cmd, input=input, capture_output=True, creationflags=_SUBPROCESS_FLAGS)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode("utf-8", "replace").strip() or "ffmpeg failed")
+    return proc.stdout
+
+
+@functools.lru_cache(maxsize=8)
+def silence_mp3(duration: float) -> bytes:
+    """duration seconds of silence in the same MP3 format as the TTS chunks."""
+    return run_ffmpeg([
+        "-f", "lavfi", "-i", f"anullsrc=r={TTS_SAMPLE_RATE}:cl=mono",
+        "-t", f"{duration:.3f}", "-c:a", "libmp3lame", "-b:a", TTS_BITRATE, "-f", "mp3", "pipe:1",
+    ])
+
+
+def write_video_only(clips: list, path: str, prof: dict, fps: float = None,
+                     ffmpeg_params: list[str] = (), method: str = "compose", logger=None):
+    """Concatenate clips, encode them video-only with the settings of prof and close them."""
+    from moviepy import concatenate_videoclips
+
+    fps = fps or prof["fps"]
+    final = concatenate_videoclips(clips, method=method)
+    # MoviePy writes int(duration * fps) frames: keep float rounding from
+    # dropping the last frame of clips built from whole frames
+    final = final.with_duration((round(final.duration * fps) + 0.001) / fps)
+    final.write_videofile(
+        path,
+        fps=fps,
+        codec=prof["codec"],
+        preset=prof["preset"],
+        ffmpeg_params=["-crf", str(prof["crf"])] + list(ffmpeg_params),
+        audio=False,
+        logger=logger,
+    )
+    final.close()
+    for clip in clips:
+        clip.close()
+
+
+def concat_video_segments(paths: list[str], out_path: str):
+    """Join video-only MP4 segments with identical encoder settings (concat demuxer, no re-encode)."""
+    list_path = out_path + ".txt"
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in paths:
+            f.write("file '" + os.path.abspath(p).replace("'", "'\\''") + "'\n")
+    try:
+        run_ffmpeg(["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", out_path])
+    finally:
+        os.remove(list_path)
+
+
+def mux_audio(video_path: str, audio_path: str, output_path: str, audio_bitrate: str):
+    """Mux a video-only MP4 with an MP3 track: video is copied, audio encoded once to AAC."""
+    run_ffmpeg([
+        "-i", video_path, "-i", audio_path,
+        "-map", "0:v:0", "-map", "1:a:0",
+        "-c:v", "copy", "-c:a", "aac", "-b:a", audio_bitrate,
+        "-movflags", "+faststart",
+        output_path,
+    ])
+
+
+# ─────────────────────────── MP3 ASSEMBLY ─────────────────────────────────────
+
+# Layer III bitrates (kbps) by bitrate index, for MPEG-1 and MPEG-2/2.5
+_MP3_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_MP3_SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+XING_TOC_SIZE = 100
+
+
+def _parse_mp3_header(h: int):
+    """Decode a 32-bit Layer III frame header; None if it is not one."""
+    version = (h >> 19) & 3
+    layer = (h >> 17) & 3
+    br_idx = (h >> 12) & 15
+    sr_idx = (h >> 10) & 3
+    if (h >> 21) != 0x7FF or version == 1 or layer != 1 or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[1 if mpeg1 else 2][br_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sr_idx]
+    mono = ((h >> 6) & 3) == 3
+    return {
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples": 1152 if mpeg1 else 576,
+        "length": (144 if mpeg1 else 72) * bitrate // sample_rate + ((h >> 9) & 1),
+        "side_info": (17 if mono else 32) if mpeg1 else (9 if mono else 17),
+        "header": h,
+    }
+
+
+def scan_mp3_frames(data: bytes):
+    """
+    Walk the MPEG Layer III frames of an MP3 file.
+    Returns (frames, fmt): frames is a list of (offset, length, bitrate) for
+    every audio frame, fmt the parsed header of the first one (None if there
+    are no frames). ID3v2/ID3v1 tags and Xing/Info/VBRI header frames are
+    skipped, so chunks written by different encoders can be re-assembled.
+    """
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    frames = []
+    fmt = None
+    end = len(data)
+    while pos + 4 <= end:
+        info = _parse_mp3_header(int.from_bytes(data[pos:pos + 4], "big"))
+        if info is None or pos + info["length"] > end:
+            pos += 1  # resync (garbage, trailing tag or truncated frame)
+            continue
+        length = info["length"]
+        tag_at = pos + 4 + info["side_info"]
+        if not frames and (data[tag_at:tag_at + 4] in (b"Xing", b"Info")
+                           or data[pos + 36:pos + 40] == b"VBRI"):
+            pos += length
+            continue
+        if fmt is None:
+            fmt = info
+        frames.append((pos, length, info["bitrate"]))
+        pos += length
+    return frames, fmt
+
+
+def _build_xing_frame(fmt: dict, frames: list, cbr: bool) -> bytes:
+    """
+    Build an Info (CBR) / Xing (VBR) header frame describing `frames`:
+    frame count, stream size and a 100-entry seek TOC, so players can seek
+    and show the duration without scanning the whole stream.
+    """
+    h = fmt["header"]
+    mpeg1 = fmt["samples"] == 1152
+    payload_len = 4 + fmt["side_info"] + 4 + 4 + 4 + 4 + XING_TOC_SIZE + 4
+    # Smallest bitrate whose (silent) frame can hold the header
+    for br_idx in range(1, 15):
+        bitrate = _MP3_BITRATES[1 if mpeg1 else 2][br_idx] * 1000
+        frame_len = (144 if mpeg1 else 72) * bitrate // fmt["sample_rate"]
+        if frame_len >= payload_len:
+            break
+    # Keep sync/version/layer, sample rate and channel mode; no CRC, no padding
+    header = (h & 0xFFFE0CC0) | 0x00010000 | (br_idx << 12)
+
+    stream_bytes = frame_len + sum(length for _, length, _ in frames)
+    toc = bytearray(XING_TOC_SIZE)
+    n = len(frames)
+    offset = frame_len
+    fi = 0
+    for i in range(XING_TOC_SIZE):
+        target = i * n // XING_TOC_SIZE
+        while fi < target:
+            offset += frames[fi][1]
+            fi += 1
+        toc[i] = min(255, offset * 256 // stream_bytes)
+
+    frame = bytearray(frame_len)
+    frame[0:4] = header.to_bytes(4, "big")
+    pos = 4 + fmt["side_info"]
+    xing = (b"Info" if cbr else b"Xing") + (0x0F).to_bytes(4, "big") \
+        + n.to_bytes(4, "big") + stream_bytes.to_bytes(4, "big") + bytes(toc) + (0).to_bytes(4, "big")
+    frame[pos:pos + len(xing)] = xing
+    return bytes(frame)
+
+
+def _build_chapter_tag(chapters: list[tuple], starts: list[float], total: float):
+    """ID3 tag with a top-level CTOC and one CHAP per (part index, title) chapter."""
+    from mutagen.id3 import CHAP, CTOC, ID3, TIT2, CTOCFlags
+
+    tag = ID3()
+    ids = []
+    for n, (part_idx, title) in enumerate(chapters):
+        start = starts[part_idx]
+        end = starts[chapters[n + 1][0]] if n + 1 < len(chapters) else total
+        element_id = f"ch{n}"
+        ids.append(element_id)
+        tag.add(CHAP(element_id=element_id, start_time=int(round(start * 1000)),
+                     end_time=int(round(end * 1000)), start_offset=0xFFFFFFFF, end_offset=0xFFFFFFFF,
+                     sub_frames=[TIT2(encoding=3, text=[title])]))
+    tag.add(CTOC(element_id="toc", flags=CTOCFlags.TOP_LEVEL | CTOCFlags.ORDERED,
+                 child_element_ids=ids, sub_frames=[TIT2(encoding=3, text=["Περιεχόμενα"])]))
+    return tag
+
+
+def assemble_mp3(paths: list[str], out_path: str, chapters: list[tuple] = (),
+                 store: ScratchStore = None):
+    """
+    Join MP3 parts (TTS chunks, silence) into one seekable stream at out_path.
+    With store, paths are entry names in it and in-memory parts are read
+    through memoryviews without copies or file I/O.
+
+    Only the audio frames of each part are copied - their own ID3 and
+    Info headers are dropped - behind a single Xing/Info frame with a seek
+    TOC. chapters is a list of (part index, title) marking where each
+    chapter starts; they are written as ID3v2.3 CHAP/CTOC frames with times
+    taken from the frame counts, so they match the audio exactly.
+    All parts must share the sample rate of the TTS output.
+    """
+    def read(p):
+        if store is not None:
+            return store.view(p)
+        with open(p, "rb") as f:
+            return f.read()
+
+    parts = []  # (path, frames)
+    all_frames = []
+    fmt = None
+    for p in paths:
+        frames, part_fmt = scan_mp3_frames(read(p))
+        parts.append((p, frames))
+        all_frames.extend(frames)
+        fmt = fmt or part_fmt
+
+    with open(out_path, "wb"):
+        pass
+    if fmt is None:
+        return
+
+    frame_time = fmt["samples"] / fmt["sample_rate"]
+    if chapters:
+        starts = []
+        t = 0.0
+        for _, frames in parts:
+            starts.append(t)
+            t += len(frames) * frame_time
+        # v2.3: CHAP/CTOC are understood by far more players than in v2.4 tags
+        _build_chapter_tag(list(chapters), starts, t).save(out_path, v2_version=3)
+
+    cbr = len({bitrate for _, _, bitrate in all_frames}) == 1
+    with open(out_path, "ab") as out:
+        out.write(_build_xing_frame(fmt, all_frames, cbr))
+        for p, frames in parts:
+            if not frames:
+                continue
+            view = memoryview(read(p))
+            # Frames of one part are contiguous, except around skipped tags
+            start, prev_end = frames[0][0], frames[0][0]
+            for offset, length, _ in frames:
+                if offset != prev_end:
+                    out.write(view[start:prev_end])
+                    start = offset
+                prev_end = offset + length
+            out.write(view[start:prev_end])
+
+
 # ─────────────────────── WORD-TIMING ALIGNMENT ────────────────────────────────
 
 def align_word_timings_to_text(word_timings: list[dict], text: str) -> list[dict]:
@@ -551,347 +2192,1664 @@ def align_word_timings_to_text(word_timings: list[dict], text: str) -> list[dict
         if not matched:
             tw["text_word"] = tw["word"]
 
-    return timing_words
+    return timing_words
+
+
+def quantize_word_timeline(word_timings: list[dict], duration: float, fps: float,
+                           start_time: float = 0.0) -> list[tuple]:
+    """
+    Map a paragraph's word timeline onto the output frame grid.
+
+    The paragraph occupies the global frames from round(start_time * fps) to
+    round((start_time + duration) * fps), so rounding never accumulates across
+    paragraphs. Each frame shows the last word whose offset is at or before
+    the frame's midpoint; words that own no frame are dropped.
+
+    Returns a list of (word_index or None, n_frames) runs; None means no word
+    highlighted yet (pre-roll before the first word).
+    """
+    first = round(start_time * fps)
+    last = round((start_time + duration) * fps)
+
+    segments = []
+    w = -1
+    n_timings = len(word_timings)
+    for k in range(first, last):
+        t = (k + 0.5) / fps - start_time
+        while w + 1 < n_timings and word_timings[w + 1]["offset_s"] <= t:
+            w += 1
+        idx = w if w >= 0 else None
+        if segments and segments[-1][0] == idx:
+            segments[-1][1] += 1
+        else:
+            segments.append([idx, 1])
+
+    return [tuple(seg) for seg in segments]
+
+
+def iter_video_paragraphs(filepath: str, workers: int = None):
+    """
+    Yield the paragraphs of extract_video_paragraphs one by one, as the
+    document is parsed: (text, page_idx, fitz.Rect) for PDF and
+    (text, para_idx, None) for DOCX. workers: see iter_pdf_page_blocks.
+    """
+    ext = filepath.lower().split('.')[-1]
+
+    if ext == 'pdf':
+        import fitz  # PyMuPDF
+        for page_idx, merged in iter_pdf_page_blocks(filepath, workers):
+            for (x0, y0, x1, y1, text) in merged:
+                if is_valid_text(text):
+                    yield text, page_idx, fitz.Rect(x0, y0, x1, y1)
+    elif ext == 'docx':
+        para_idx = 0
+        for text in iter_docx_paragraphs(filepath):
+            text = text.strip()
+            if is_valid_text(text):
+                yield text, para_idx, None
+                para_idx += 1
+    else:
+        raise ValueError("Μη υποστηριζόμενη μορφή αρχείου")
+
+
+def extract_video_paragraphs(filepath: str) -> tuple[list[tuple], object]:
+    """
+    Extract paragraphs for the video renderers.
+    Returns (para_data, pdf_doc) where para_data is a list of
+    (text, page_idx, fitz.Rect) for PDF and (text, para_idx, None) for DOCX;
+    pdf_doc is the open fitz document (None for DOCX).
+    """
+    para_data = list(iter_video_paragraphs(filepath))
+    pdf_doc = None
+    if filepath.lower().endswith(".pdf"):
+        import fitz  # PyMuPDF
+        pdf_doc = fitz.open(filepath)
+
+    if not para_data:
+        raise ValueError("Δεν βρέθηκαν παράγραφοι στο αρχείο.")
+
+    return para_data, pdf_doc
+
+
+def make_moviepy_logger(progress_callback, control: JobControl = None):
+    """
+    Return a proglog logger that forwards MoviePy progress to progress_callback.
+    If control is given, every frame is also a pause/cancel checkpoint.
+    """
+    from proglog import ProgressBarLogger
+
+    class FletMoviepyLogger(ProgressBarLogger):
+        def __init__(self, cb):
+            super().__init__()
+            self.ui_callback = cb
+
+        def bars_callback(self, bar, attr, value, old_value=None):
+            if control is not None:
+                control.check()
+            if attr == 'index' and bar in ('chunk', 't', 'frame_index'):
+                total = self.bars[bar].get('total', 1)
+                if total > 0:
+                    pct = int((value / total) * 100)
+                    msg = "Μίξη ήχου..." if bar == 'chunk' else "Συναρμολόγηση βίντεο..."
+                    self.ui_callback(value, total, f"{msg} {pct}%")
+
+    return FletMoviepyLogger(progress_callback)
+
+
+def pick_voice(text: str, voice_index: int) -> str:
+    """Alternate male/female voice per paragraph, Greek or English by script."""
+    if is_english(text):
+        return VOICE_EN_MALE if voice_index % 2 == 0 else VOICE_EN_FEMALE
+    return VOICE_MALE if voice_index % 2 == 0 else VOICE_FEMALE
+
+
+async def synthesize_paragraph(text: str, voice: str, store: ScratchStore, tag: str,
+                               control: JobControl = None) -> tuple[list[str], list[dict], float, bool]:
+    """
+    TTS one paragraph (chunked) into store entries audio_<tag>_<n>.mp3.
+    Returns (audio_names, word_timings, duration, spoke): word timings are
+    shifted to the paragraph start and aligned to the text. If every chunk
+    failed, audio_names is a 3s silence (matching the fallback frame) and
+    spoke is False.
+    """
+    set_job_stage("tts")
+    # For long paragraphs we chunk the text
+    chunks = chunk_text(text, 800)
+    chunk_audio_names = []
+    all_word_timings = []     # accumulated across chunks
+    chunk_time_offset = 0.0  # running time offset for multi-chunk paragraphs
+
+    for c_idx, chunk in enumerate(chunks):
+        await job_checkpoint(control)
+        chunk_audio_name = f"audio_{tag}_{c_idx}.mp3"
+        word_timings = await synthesize_chunk(chunk, voice, store, chunk_audio_name)
+
+        if word_timings is not None:
+            chunk_audio_names.append(chunk_audio_name)
+
+            # Shift word timings by the running offset
+            for wt in word_timings:
+                shifted = dict(wt)
+                shifted["offset_s"] += chunk_time_offset
+                all_word_timings.append(shifted)
+
+            # Duration from the MP3 frame headers (no ffmpeg reader)
+            chunk_time_offset += mp3_duration(store.view(chunk_audio_name))
+
+    if not chunk_audio_names:
+        # Keep the single audio track aligned with the 3s fallback frame
+        silence = await asyncio.to_thread(call_in_stage, "tts", silence_mp3, 3.0)
+        return [store.put(f"silence_{tag}.mp3", silence)], [], 3.0, False
+
+    # Align word timings to actual text
+    set_job_stage("align")
+    if all_word_timings:
+        all_word_timings = align_word_timings_to_text(all_word_timings, text)
+    return chunk_audio_names, all_word_timings, chunk_time_offset, True
+
+
+async def render_paragraph_clip(para_item: tuple, word_timings: list[dict], duration: float,
+                                timeline_t: float, total: int, pdf_doc, prof: dict,
+                                control: JobControl = None, atlas: "WordAtlas" = None,
+                                governor: MemoryGovernor = None, spill=None):
+    """
+    Build the clip of one paragraph (see extract_video_paragraphs for
+    para_item) on the output frame grid of prof, starting at timeline_t on
+    the global timeline. pdf_doc is None for DOCX. Returns None when the
+    paragraph is shorter than half a frame on the grid, or when all of it
+    was spilled. Frames held by the clip are reported to governor; under
+    pressure the word clips built so far are passed to `await spill(clips)`,
+    which encodes them after the job's pending clips.
+    """
+    import numpy as np
+    from moviepy import ImageClip, concatenate_videoclips
+
+    set_job_stage("render")
+    out_w, out_h, out_fps = prof["width"], prof["height"], prof["fps"]
+    text = para_item[0]
+    is_pdf = pdf_doc is not None
+
+    # One segment per run of frames showing the same word; words shorter
+    # than a frame are merged away, and the paragraph spans exactly the
+    # frames of its audio on the global timeline (no cumulative drift).
+    segments = quantize_word_timeline(word_timings, duration, out_fps, timeline_t)
+
+    para_clips = []
+
+    if word_timings:
+        # ── Word-level frame generation ───────────────────────────────────────
+
+        # For PDF: pre-render the base page image ONCE (no highlight),
+        # then composite word highlights on top.
+        # This avoids re-rendering the full page for every word.
+        if is_pdf:
+            _, page_idx, para_rect = para_item
+            base_pdf_img = render_page_pdf_image(
+                pdf_doc,
+                page_idx,
+                highlight_rect=para_rect,
+                word_highlight_rect=None,
+                target_w=out_w,
+                target_h=out_h,
+            )
+            # Normalise word rects for this page (scale + offset)
+            page = pdf_doc[page_idx]
+            page_rect = page.rect
+            scale = min(out_w / page_rect.width, out_h / page_rect.height)
+            x_off = (out_w - int(page_rect.width * scale)) // 2
+            y_off = (out_h - int(page_rect.height * scale)) // 2
+
+            # Match every timed word (shown or not) so the sequential
+            # pointer into the page words stays in step
+            pdf_word_rects = get_pdf_word_rects(pdf_doc, page_idx, para_rect)
+            word_rects = match_pdf_word_rects(
+                [wt.get("text_word", wt["word"]) for wt in word_timings],
+                pdf_word_rects,
+            )
+
+        for w_idx, n_frames in segments:
+            await job_checkpoint(control)
+            clip_dur = n_frames / out_fps
+
+            if is_pdf:
+                # Composite highlight onto cached base image
+                from PIL import Image, ImageDraw
+                frame_img = base_pdf_img.copy()
+                matching_rect = word_rects[w_idx] if w_idx is not None else None
+                if matching_rect is not None:
+                    overlay = Image.new("RGBA", (out_w, out_h), (0, 0, 0, 0))
+                    draw = ImageDraw.Draw(overlay)
+                    wx0 = int(matching_rect.x0 * scale) + x_off
+                    wy0 = int(matching_rect.y0 * scale) + y_off
+                    wx1 = int(matching_rect.x1 * scale) + x_off
+                    wy1 = int(matching_rect.y1 * scale) + y_off
+                    draw.rectangle([wx0, wy0, wx1, wy1], fill=(57, 255, 20, 140))
+                    draw.rectangle([wx0, wy0, wx1, wy1],
+                                   outline=(57, 255, 20, 255), width=3)
+                    frame_img = Image.alpha_composite(
+                        frame_img.convert("RGBA"), overlay
+                    ).convert("RGB")
+                frame_np = np.array(frame_img)
+            else:
+                _, para_idx, _ = para_item
+                word_text = None
+                if w_idx is not None:
+                    wt = word_timings[w_idx]
+                    word_text = wt.get("text_word", wt["word"])
+                frame_np = render_docx_paragraph_frame(
+                    text, para_idx, total,
+                    highlight_word=word_text,
+                    target_w=out_w, target_h=out_h,
+                    atlas=atlas,
+                )
+
+            if governor is not None:
+                governor.track(frame_np)
+            para_clips.append(ImageClip(frame_np, duration=clip_dur))
+
+            # Long paragraphs can outgrow the budget on their own; segments
+            # are whole frames, so they can be spilled mid-paragraph
+            if spill is not None and governor.pressure():
+                await spill(para_clips)
+                para_clips = []
+
+    else:
+        # ── Fallback: paragraph-level (original behaviour) ────────────────────
+        if is_pdf:
+            _, page_idx, rect = para_item
+            frame_np = np.array(render_page_pdf_image(
+                pdf_doc, page_idx, highlight_rect=rect, target_w=out_w, target_h=out_h,
+            ))
+        else:
+            _, para_idx, _ = para_item
+            frame_np = render_docx_paragraph_frame(
+                text, para_idx, total, target_w=out_w, target_h=out_h, atlas=atlas,
+            )
+
+        if governor is not None and segments:
+            governor.track(frame_np)
+        for _, n_frames in segments:
+            para_clips.append(ImageClip(frame_np, duration=n_frames / out_fps))
+
+    # Shorter than half a frame on the grid: nothing to show
+    if not para_clips:
+        return None
+
+    # Concatenate word clips → paragraph clip
+    if len(para_clips) == 1:
+        return para_clips[0]
+    return concatenate_videoclips(para_clips, method="compose")
+
+
+async def spill_video_segment(clips: list, segments: list[str], store: ScratchStore,
+                              prof: dict, write_args: tuple = ()):
+    """Encode clips to the next video-only segment of store and append its path to segments."""
+    set_job_stage("wait")  # the encode runs in a pool thread
+    segments.append(store.new_path(f"segment_{len(segments)}.mp4"))
+    await asyncio.to_thread(call_in_stage, "encode", write_video_only, clips, segments[-1],
+                            prof, *write_args)
+
+
+def finalize_video_job(clips: list, segments: list[str], audio_parts: list[str],
+                       store: ScratchStore, prof: dict, output_path: str, mp3_path: str = None,
+                       chapters=(), cues=(), sidecars=(), write_args: tuple = (), logger=None):
+    """
+    Last step of every MP4 job, run in a worker thread: encode the clips not
+    spilled yet after the video-only segments, join them, join audio_parts
+    (entries of store) into one MP3 and mux both into output_path. With
+    mp3_path the MP3 is kept there with chapters. sidecars are written for
+    output_path (and mp3_path) from cues. write_args: (fps, ffmpeg_params,
+    method) for write_video_only.
+    """
+    try:
+        set_job_stage("encode")
+        segments = list(segments)
+        if clips:
+            segments.append(store.new_path(f"segment_{len(segments)}.mp4"))
+            write_video_only(clips, segments[-1], prof, *write_args, logger=logger)
+        if len(segments) == 1:
+            video_path = segments[0]
+        else:
+            video_path = store.new_path("video_only.mp4")
+            concat_video_segments(segments, video_path)
+
+        set_job_stage("mux")
+        audio_path = mp3_path or store.new_path("audio_full.mp3")
+        assemble_mp3(audio_parts, audio_path, chapters if mp3_path else (), store)
+        mux_audio(video_path, audio_path, output_path, prof["audio_bitrate"])
+        if sidecars:
+            write_sidecars(cues, output_path, sidecars)
+            if mp3_path and os.path.splitext(mp3_path)[0] != os.path.splitext(output_path)[0]:
+                write_sidecars(cues, mp3_path, sidecars)
+    finally:
+        set_job_stage(None)
 
 
-async def convert_to_video(filepath: str, output_path: str, progress_callback):
+async def convert_to_video(filepath: str, output_path: str, progress_callback,
+                           profile: str = DEFAULT_PROFILE, control: JobControl = None,
+                           sidecars=(), memory_mb: int = None, mp3_path: str = None):
     """
     Master function: extract paragraphs (with positions for PDF),
     generate TTS per paragraph with word timings, build per-word video frames,
     assemble mp4.
+    profile selects resolution, fps and encoder settings (see OUTPUT_PROFILES).
+    control (optional) allows pausing/cancelling between chunks and frames.
+    sidecars: subtitle formats (see SIDECAR_FORMATS) to write next to the mp4.
+    memory_mb: memory budget (default MEMORY_BUDGET_MB); under pressure the
+    finished clips are encoded to a segment on disk before going on.
+    mp3_path: also keep the soundtrack as a chaptered MP3 there, from the same
+    TTS pass (one synthesis for both outputs).
     """
-    import numpy as np
-    from moviepy import ImageClip, AudioFileClip, concatenate_videoclips, concatenate_audioclips
-    from proglog import ProgressBarLogger
-
-    class FletMoviepyLogger(ProgressBarLogger):
-        def __init__(self, cb):
-            super().__init__()
-            self.ui_callback = cb
-
-        def bars_callback(self, bar, attr, value, old_value=None):
-            if attr == 'index' and bar in ('chunk', 't', 'frame_index'):
-                total = self.bars[bar].get('total', 1)
-                if total > 0:
-                    pct = int((value / total) * 100)
-                    msg = "Μίξη ήχου..." if bar == 'chunk' else "Συναρμολόγηση βίντεο..."
-                    self.ui_callback(value, total, f"{msg} {pct}%")
+    prof = get_output_profile(profile)
 
     ext = filepath.lower().split('.')[-1]
-    temp_dir = tempfile.mkdtemp()
+    store = ScratchStore()
 
     try:
         # ── 1. Extract paragraphs ─────────────────────────────────────────────
-        if ext == 'pdf':
-            pdf_doc = fitz.open(filepath)
-            para_data = []  # (text, page_idx, rect)
-            for page_idx, page in enumerate(pdf_doc):
-                blocks = page.get_text("blocks")
-                merged = merge_pdf_blocks(blocks)
-                for (x0, y0, x1, y1, text) in merged:
-                    if is_valid_text(text):
-                        rect = fitz.Rect(x0, y0, x1, y1)
-                        para_data.append((text, page_idx, rect))
-        else:  # docx
-            doc_obj = docx.Document(filepath)
-            para_data = []
-            for p in doc_obj.paragraphs:
-                text = p.text.strip()
-                if is_valid_text(text):
-                    para_data.append((text, len(para_data), None))
-
-        if not para_data:
-            raise ValueError("Δεν βρέθηκαν παράγραφοι στο αρχείο.")
+        set_job_stage("extract")
+        para_data, pdf_doc = extract_video_paragraphs(filepath)
 
         total = len(para_data)
-        clips = []
+        clips = []    # finished clips not encoded yet
+        spilled = []  # video-only segments written under memory pressure
+        audio_parts = []  # mp3 entries of store in playback order; joined and muxed once
         voice_index = 0
+        timeline_t = 0.0  # start of the current paragraph in the audio track
+        cues = []
+        chapters = []  # (index into audio_parts, title), one per paragraph
+        atlas = WordAtlas() if ext == 'docx' else None
+        governor = MemoryGovernor(memory_mb)
+
+        async def spill(para_clips=()):
+            # Backpressure: no more TTS/rendering until the clips are on disk.
+            # Clips span whole frames, so the segments join without drift.
+            nonlocal clips
+            progress_callback(i, total, f"Παράγραφος {i+1}/{total}: Αποθήκευση τμήματος (όριο μνήμης)…")
+            await spill_video_segment(clips + list(para_clips), spilled, store, prof)
+            clips = []
+            if atlas is not None:
+                atlas.clear()
+            governor.released()
 
         # ── 2. Per-paragraph: TTS with word timings + frames ──────────────────
         for i, para_item in enumerate(para_data):
             text = para_item[0]
             progress_callback(i, total, f"Παράγραφος {i+1}/{total}: TTS + λέξεις…")
-            await asyncio.sleep(0)  # yield to UI
+            await job_checkpoint(control)  # yield to UI
+
+            voice = pick_voice(text, voice_index)
+            audio_names, word_timings, duration, spoke = await synthesize_paragraph(
+                text, voice, store, str(i), control)
+            chapters.append((len(audio_parts), textwrap.shorten(text, 60, placeholder="…")))
+            audio_parts.extend(audio_names)
+            if spoke:
+                voice_index += 1
+                append_cue(cues, i, text, timeline_t, duration, word_timings)
 
-            # Pick voice
-            voice = (
-                (VOICE_EN_MALE if voice_index % 2 == 0 else VOICE_EN_FEMALE)
-                if is_english(text)
-                else (VOICE_MALE if voice_index % 2 == 0 else VOICE_FEMALE)
-            )
+            progress_callback(i, total, f"Παράγραφος {i+1}/{total}: Frames…")
+            await job_checkpoint(control)
+            para_video = await render_paragraph_clip(
+                para_item, word_timings, duration, timeline_t, total, pdf_doc, prof, control, atlas,
+                governor, spill)
+            timeline_t += duration
+            if para_video is not None:
+                clips.append(para_video)
+            if governor.pressure():
+                await spill()
+
+        if not clips and not spilled:
+            raise ValueError("Δεν δημιουργήθηκε βίντεο για κανένα τμήμα του αρχείου.")
+
+        # ── 3. Assemble final video ────────────────────────────────────────────
+        progress_callback(total, total, "Συναρμολόγηση βίντεο...")
+        await job_checkpoint(control)
+
+        ui_logger = make_moviepy_logger(progress_callback, control)
+        set_job_stage("wait")  # the job thread idles while the encoder thread works
+        await asyncio.to_thread(finalize_video_job, clips, spilled, audio_parts, store, prof,
+                                output_path, mp3_path, chapters, cues, sidecars, logger=ui_logger)
 
-            # For long paragraphs we chunk the text
-            chunks = chunk_text(text, 800)
-            chunk_audio_clips = []
-            all_word_timings = []     # accumulated across chunks
-            chunk_time_offset = 0.0  # running time offset for multi-chunk paragraphs
+    finally:
+        set_job_stage(None)
+        store.close()
 
-            for c_idx, chunk in enumerate(chunks):
-                chunk_audio_path = os.path.join(temp_dir, f"audio_{i}_{c_idx}.mp3")
-                word_timings = await generate_tts_with_word_timings(chunk, voice, chunk_audio_path)
 
-                if os.path.exists(chunk_audio_path) and os.path.getsize(chunk_audio_path) > 0:
-                    ac = AudioFileClip(chunk_audio_path)
-                    chunk_audio_clips.append(ac)
+# Still slides change only between paragraphs/pages, so a very low frame
+# rate is enough; x264 is tuned for static content.
+SLIDESHOW_FPS = 2
+SLIDESHOW_X264_PARAMS = ["-tune", "stillimage", "-g", "600"]
 
-                    # Shift word timings by the running offset
-                    for wt in word_timings:
-                        shifted = dict(wt)
-                        shifted["offset_s"] += chunk_time_offset
-                        all_word_timings.append(shifted)
 
-                    chunk_time_offset += ac.duration
-                else:
-                    # Fallback: plain TTS without timings
-                    ok = await generate_tts_chunk(chunk, voice, chunk_audio_path)
-                    if ok:
-                        ac = AudioFileClip(chunk_audio_path)
-                        chunk_audio_clips.append(ac)
-                        chunk_time_offset += ac.duration
-
-            if chunk_audio_clips:
-                if len(chunk_audio_clips) == 1:
-                    combined_audio = chunk_audio_clips[0]
-                else:
-                    combined_audio = concatenate_audioclips(chunk_audio_clips)
-                total_duration = combined_audio.duration
-                voice_index += 1
-            else:
-                combined_audio = None
-                total_duration = 3.0
+async def convert_to_slideshow(filepath: str, output_path: str, progress_callback,
+                               profile: str = DEFAULT_PROFILE, control: JobControl = None,
+                               sidecars=(), memory_mb: int = None, mp3_path: str = None):
+    """
+    Fast MP4 without word highlighting: one still per PDF page (or per DOCX
+    paragraph), all TTS audio concatenated into a single track and encoded
+    with still-image settings. With sidecars, word timings are still requested
+    so players can do the highlighting from the subtitle file.
+    memory_mb: memory budget, as for convert_to_video.
+    mp3_path: also keep the soundtrack as a chaptered MP3, as for convert_to_video.
+    """
+    import numpy as np
+    from moviepy import ImageClip
 
-            # ── 3. Align word timings to actual text ──────────────────────────
-            if all_word_timings:
-                all_word_timings = align_word_timings_to_text(all_word_timings, text)
+    prof = get_output_profile(profile)
+    out_w, out_h = prof["width"], prof["height"]
 
-            # ── 4. Build per-word frames ───────────────────────────────────────
-            progress_callback(i, total, f"Παράγραφος {i+1}/{total}: Frames…")
-            await asyncio.sleep(0)
-
-            # Pre-fetch PDF word rects (only for PDF with word timings)
-            pdf_word_rects = []
-            if ext == 'pdf' and all_word_timings:
-                _, page_idx, para_rect = para_item
-                pdf_word_rects = get_pdf_word_rects(pdf_doc, page_idx, para_rect)
-
-            para_clips = []
-
-            if all_word_timings:
-                # ── Word-level frame generation ───────────────────────────────
-
-                # For PDF: pre-render the base page image ONCE (no highlight),
-                # then composite word highlights on top.
-                # This avoids re-rendering the full page for every word.
-                if ext == 'pdf':
-                    _, page_idx, para_rect = para_item
-                    base_pdf_img = render_page_pdf_image(
-                        pdf_doc,
-                        page_idx,
-                        highlight_rect=para_rect,
-                        word_highlight_rect=None,
+    ext = filepath.lower().split('.')[-1]
+    store = ScratchStore()
+    governor = MemoryGovernor(memory_mb)
+    write_args = (SLIDESHOW_FPS, SLIDESHOW_X264_PARAMS, "chain")
+
+    try:
+        set_job_stage("extract")
+        para_data, pdf_doc = extract_video_paragraphs(filepath)
+        total = len(para_data)
+
+        # Group paragraphs into slides: one per PDF page, one per DOCX paragraph
+        slides = []  # (slide_key, [para indices])
+        for i, (text, key, rect) in enumerate(para_data):
+            if ext == 'pdf' and slides and slides[-1][0] == key:
+                slides[-1][1].append(i)
+            else:
+                slides.append((key, [i]))
+
+        audio_parts = []
+        chapters = []  # (index into audio_parts, title), one per spoken paragraph
+        video_clips = []
+        spilled = []
+        voice_index = 0
+        timeline_t = 0.0
+        cues = []
+
+        for slide_key, para_indices in slides:
+            slide_duration = 0.0
+
+            for i in para_indices:
+                text = para_data[i][0]
+                progress_callback(i, total, f"Παράγραφος {i+1}/{total}: TTS…")
+                await job_checkpoint(control)
+
+                set_job_stage("tts")
+                voice = pick_voice(text, voice_index)
+                spoke = False
+                for c_idx, chunk in enumerate(chunk_text(text, 800)):
+                    await job_checkpoint(control)
+                    chunk_audio_name = f"audio_{i}_{c_idx}.mp3"
+                    word_timings = await synthesize_chunk(
+                        chunk, voice, store, chunk_audio_name, word_timings=bool(sidecars),
                     )
-                    # Normalise word rects for this page (scale + offset)
-                    page = pdf_doc[page_idx]
-                    page_rect = page.rect
-                    scale = min(VIDEO_W / page_rect.width, VIDEO_H / page_rect.height)
-                    x_off = (VIDEO_W - int(page_rect.width * scale)) // 2
-                    y_off = (VIDEO_H - int(page_rect.height * scale)) // 2
+                    if word_timings is not None:
+                        chunk_duration = mp3_duration(store.view(chunk_audio_name))
+                        if not spoke:
+                            chapters.append((len(audio_parts), textwrap.shorten(text, 60, placeholder="…")))
+                        audio_parts.append(chunk_audio_name)
+                        append_cue(cues, i, chunk, timeline_t + slide_duration, chunk_duration,
+                                   align_word_timings_to_text(word_timings, chunk))
+                        slide_duration += chunk_duration
+                        spoke = True
+                if spoke:
+                    voice_index += 1
+
+            # A slide without audio would desynchronise the single track
+            if slide_duration <= 0:
+                continue
+            # Slides span whole frames of the global grid, so spilled
+            # segments join without drift
+            n_frames = round((timeline_t + slide_duration) * SLIDESHOW_FPS) - round(timeline_t * SLIDESHOW_FPS)
+            timeline_t += slide_duration
+            if n_frames <= 0:
+                continue
 
-                    # Sequential pointer into pdf_word_rects
-                    wr_ptr = 0
+            set_job_stage("render")
+            if ext == 'pdf':
+                frame_img = render_page_pdf_image(
+                    pdf_doc, slide_key, target_w=out_w, target_h=out_h,
+                )
+            else:
+                frame_img = render_docx_paragraph_image(
+                    para_data[para_indices[0]][0], slide_key, total,
+                    target_w=out_w, target_h=out_h,
+                )
+            frame_np = np.array(frame_img)
+            governor.track(frame_np)
+            video_clips.append(ImageClip(frame_np, duration=n_frames / SLIDESHOW_FPS))
+
+            if governor.pressure():
+                await spill_video_segment(video_clips, spilled, store, prof, write_args)
+                video_clips = []
+                governor.released()
+
+        if not video_clips and not spilled:
+            raise ValueError("Δεν δημιουργήθηκε ήχος για κανένα τμήμα του αρχείου.")
 
-                    # Pre-roll: blank (no word highlight) frame before first word
-                    first_offset = all_word_timings[0]["offset_s"]
-                    if first_offset > 0.05:
-                        para_clips.append(ImageClip(np.array(base_pdf_img), duration=first_offset))
+        progress_callback(total, total, "Συναρμολόγηση βίντεο...")
+        await job_checkpoint(control)
 
-                else:
-                    # DOCX pre-roll
-                    _, para_idx, _ = para_item
-                    first_offset = all_word_timings[0]["offset_s"]
-                    if first_offset > 0.05:
-                        pre_frame = render_docx_paragraph_image(text, para_idx, total)
-                        para_clips.append(ImageClip(np.array(pre_frame), duration=first_offset))
-
-                n_timings = len(all_word_timings)
-                for w_idx, wt in enumerate(all_word_timings):
-                    # Clip duration = gap to next word's offset (covers silence between words)
-                    if w_idx < n_timings - 1:
-                        clip_dur = all_word_timings[w_idx + 1]["offset_s"] - wt["offset_s"]
-                    else:
-                        clip_dur = total_duration - wt["offset_s"]
-                    if clip_dur < 0.04:
-                        clip_dur = 0.04
+        ui_logger = make_moviepy_logger(progress_callback, control)
+        set_job_stage("wait")  # the job thread idles while the encoder thread works
+        await asyncio.to_thread(finalize_video_job, video_clips, spilled, audio_parts, store, prof,
+                                output_path, mp3_path, chapters, cues, sidecars, write_args,
+                                logger=ui_logger)
 
-                    word_text = wt.get("text_word", wt["word"])
+    finally:
+        set_job_stage(None)
+        store.close()
 
-                    if ext == 'pdf':
-                        # Sequential search: advance wr_ptr instead of restarting
-                        norm_word = word_text.strip(".,;:!?\"'()[]\u00bb\u00ab\u2014\u2013-").lower()
-                        matching_rect = None
-                        search_limit = min(wr_ptr + 20, len(pdf_word_rects))
-                        for j in range(wr_ptr, search_limit):
-                            wr_text, wr_rect = pdf_word_rects[j]
-                            wr_norm = wr_text.strip(".,;:!?\"'()[]\u00bb\u00ab\u2014\u2013-").lower()
-                            if wr_norm == norm_word or (
-                                wr_norm and norm_word and
-                                (norm_word in wr_norm or wr_norm in norm_word)
-                            ):
-                                matching_rect = wr_rect
-                                wr_ptr = j + 1  # advance past this word
-                                break
-                        else:
-                            # No match found — advance ptr by 1 to avoid stalling
-                            if wr_ptr < len(pdf_word_rects):
-                                wr_ptr += 1
-
-                        # Composite highlight onto cached base image
-                        from PIL import Image, ImageDraw
-                        frame_img = base_pdf_img.copy()
-                        if matching_rect is not None:
-                            overlay = Image.new("RGBA", (VIDEO_W, VIDEO_H), (0, 0, 0, 0))
-                            draw = ImageDraw.Draw(overlay)
-                            wx0 = int(matching_rect.x0 * scale) + x_off
-                            wy0 = int(matching_rect.y0 * scale) + y_off
-                            wx1 = int(matching_rect.x1 * scale) + x_off
-                            wy1 = int(matching_rect.y1 * scale) + y_off
-                            draw.rectangle([wx0, wy0, wx1, wy1], fill=(57, 255, 20, 140))
-                            draw.rectangle([wx0, wy0, wx1, wy1],
-                                           outline=(57, 255, 20, 255), width=3)
-                            frame_img = Image.alpha_composite(
-                                frame_img.convert("RGBA"), overlay
-                            ).convert("RGB")
-                    else:
-                        _, para_idx, _ = para_item
-                        frame_img = render_docx_paragraph_image(
-                            text, para_idx, total,
-                            highlight_word=word_text,
-                        )
 
-                    frame_np = np.array(frame_img)
-                    para_clips.append(ImageClip(frame_np, duration=clip_dur))
+# ─────────────────────────── PREVIEW ──────────────────────────────────────────
 
-                # No gap-fill needed: offset-based durations already cover total_duration
+PREVIEW_MODES = {
+    "start": "Αρχή εγγράφου",
+    "pages": "Μία παράγραφος ανά σελίδα",
+}
+PREVIEW_SECONDS = 20          # approximate speech length of a preview
+PREVIEW_MAX_PARAGRAPHS = 8
+PREVIEW_PROFILE = "draft"
+TTS_CHARS_PER_SEC = 14        # rough speaking rate, to budget preview text before TTS
 
-            else:
-                # ── Fallback: paragraph-level (original behaviour) ────────────
-                if ext == 'pdf':
-                    _, page_idx, rect = para_item
-                    frame_img = render_page_pdf_image(pdf_doc, page_idx, highlight_rect=rect)
-                else:
-                    _, para_idx, _ = para_item
-                    frame_img = render_docx_paragraph_image(text, para_idx, total)
 
-                frame_np = np.array(frame_img)
-                para_clips.append(ImageClip(frame_np, duration=total_duration if total_duration else 3.0))
+def _cut_at_word(text: str, max_chars: int) -> str:
+    """text shortened to at most max_chars at a word boundary, marked with an ellipsis."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] or text[:max_chars]
+    return cut.rstrip(" ,;:") + "…"
+
 
-            # ── 5. Concatenate word clips → paragraph clip ─────────────────────
-            if len(para_clips) == 1:
-                para_video = para_clips[0]
+def select_preview_paragraphs(para_items, mode: str = "start",
+                              seconds: float = PREVIEW_SECONDS) -> list[tuple[tuple, str]]:
+    """
+    Pick the paragraphs of a preview from para_items (extract_video_paragraphs
+    items, any iterable) as (item, text to speak).
+    "start": the opening paragraphs, the last one cut so the speech lasts
+    about `seconds`; para_items is read no further than that. "pages": the
+    first paragraph of every PDF page (every DOCX paragraph), at most
+    PREVIEW_MAX_PARAGRAPHS spread over the document, each cut to an equal
+    share of the time.
+    """
+    if mode not in PREVIEW_MODES:
+        raise ValueError(f"Άγνωστη λειτουργία προεπισκόπησης: {mode}")
+    budget = int(seconds * TTS_CHARS_PER_SEC)
+
+    if mode == "start":
+        picked = []
+        for item in para_items:
+            sample = _cut_at_word(item[0], budget)
+            picked.append((item, sample))
+            budget -= len(sample)
+            if budget < 40:
+                break  # no few-word fragments at the end
+        return picked
+
+    firsts = []
+    seen_pages = set()
+    for item in para_items:
+        _, key, rect = item
+        if rect is None or key not in seen_pages:
+            seen_pages.add(key)
+            firsts.append(item)
+    n = min(PREVIEW_MAX_PARAGRAPHS, len(firsts))
+    chosen = sorted({k * len(firsts) // n for k in range(n)}) if n else []
+    share = max(60, budget // max(n, 1))
+    return [(firsts[j], _cut_at_word(firsts[j][0], share)) for j in chosen]
+
+
+def iter_pdf_sample_pages(pdf_doc, count: int):
+    """
+    Yield (text, page_idx, fitz.Rect) for the first paragraph of `count`
+    pages spread over pdf_doc, laying out only those pages (a blank page
+    gives way to the next one before the following sample).
+    """
+    import fitz  # PyMuPDF
+
+    n_pages = pdf_doc.page_count
+    starts = sorted({k * n_pages // count for k in range(count)}) if n_pages else []
+    for start, stop in zip(starts, starts[1:] + [n_pages]):
+        for page_idx in range(start, stop):
+            merged = merge_pdf_blocks(pdf_doc[page_idx].get_text("blocks"))
+            first = next(((x0, y0, x1, y1, text) for x0, y0, x1, y1, text in merged
+                          if is_valid_text(text)), None)
+            if first is not None:
+                x0, y0, x1, y1, text = first
+                yield text, page_idx, fitz.Rect(x0, y0, x1, y1)
+                break
+
+
+async def convert_to_preview(filepath: str, output_path: str, progress_callback,
+                             mode: str = "start", seconds: float = PREVIEW_SECONDS,
+                             control: JobControl = None, frame_callback=None):
+    """
+    Short draft-quality MP4 of a sample of the document (see
+    select_preview_paragraphs), to check the look before a full render.
+    Only the previewed part of a PDF is laid out: "start" stops parsing
+    after the opening paragraphs, "pages" reads the sampled pages only.
+    frame_callback(frame) receives the first frame (RGB array) of every
+    previewed paragraph as soon as it is rendered.
+    """
+    prof = get_output_profile(PREVIEW_PROFILE)
+    store = ScratchStore()
+    pdf_doc = None
+
+    try:
+        set_job_stage("extract")
+        if filepath.lower().endswith(".pdf"):
+            import fitz  # PyMuPDF
+            pdf_doc = fitz.open(filepath)
+            total = pdf_doc.page_count
+            if mode == "pages":
+                picked = select_preview_paragraphs(
+                    iter_pdf_sample_pages(pdf_doc, PREVIEW_MAX_PARAGRAPHS), mode, seconds)
             else:
-                para_video = concatenate_videoclips(para_clips, method="compose")
+                # Inline parsing: a few pages are read before a pool would start
+                items = iter_video_paragraphs(filepath, workers=1)
+                picked = select_preview_paragraphs(items, mode, seconds)
+                items.close()
+        else:
+            # DOCX: the header shows the paragraph count; the XML streams fast
+            para_data = list(iter_video_paragraphs(filepath))
+            total = len(para_data)
+            picked = select_preview_paragraphs(para_data, mode, seconds)
+        if not picked:
+            raise ValueError("Δεν βρέθηκαν παράγραφοι στο αρχείο.")
+        n = len(picked)
+        atlas = WordAtlas() if pdf_doc is None else None
+        clips = []
+        audio_parts = []
+        timeline_t = 0.0
+
+        for k, ((_, key, rect), text) in enumerate(picked):
+            progress_callback(k, n, f"Προεπισκόπηση: παράγραφος {k+1}/{n}…")
+            await job_checkpoint(control)
+            audio_names, word_timings, duration, _ = await synthesize_paragraph(
+                text, pick_voice(text, k), store, str(k), control)
+            audio_parts.extend(audio_names)
+            clip = await render_paragraph_clip(
+                (text, key, rect), word_timings, duration, timeline_t, total, pdf_doc, prof, control, atlas)
+            timeline_t += duration
+            if clip is not None:
+                clips.append(clip)
+                if frame_callback is not None:
+                    frame_callback(clip.get_frame(0))
+
+        if not clips:
+            raise ValueError("Δεν δημιουργήθηκε βίντεο για κανένα τμήμα του αρχείου.")
+
+        progress_callback(n, n, "Συναρμολόγηση προεπισκόπησης...")
+        set_job_stage("wait")
+        await asyncio.to_thread(finalize_video_job, clips, [], audio_parts, store, prof, output_path)
+
+    finally:
+        set_job_stage(None)
+        store.close()
+        if pdf_doc is not None:
+            pdf_doc.close()
+
+
+# ─────────────────────────── SHARDED VIDEO JOBS ───────────────────────────────
+#
+# convert_to_video split into work units that any number of worker processes
+# claim from a shared job directory (local, or a share mounted by several
+# hosts). Layout of a job directory:
+#
+#   job.json          profile, paragraphs and TTS units (paragraph ranges)
+#   source.<ext>      copy of the document; PDF pages are rendered from it
+#   render.json       start time of each render unit, published by the
+#                     coordinator once every TTS unit is done
+#   claims/<unit>     lease file; one whose mtime is older than the lease is
+#                     taken over by another worker (the owner touches it)
+#   done/<unit>.json  unit result, written atomically
+#   errors/<unit>.*   one traceback per failed attempt
+#   parts/            per-paragraph MP3s and per-unit video-only MP4s
+#   tts_breaker       reopen time of the TTS circuit breaker, once one worker trips it
+#   finished          written by the coordinator; workers exit
+#
+# Render unit k covers the paragraphs of TTS unit k. Its frames are quantized
+# on the global timeline, so the segments concatenate without drift.
+
+SHARD_PARAGRAPHS_PER_UNIT = 8
+SHARD_LEASE_S = 120.0
+SHARD_POLL_S = 0.5
+SHARD_MAX_ATTEMPTS = 3
+# Default local workers: the TTS budget is split between them, so more
+# processes add rendering throughput but no TTS throughput
+SHARD_LOCAL_WORKERS = 4
+
+
+class ShardJobError(RuntimeError):
+    """A unit of a sharded job failed SHARD_MAX_ATTEMPTS times, or no worker is left."""
+
+
+def _write_json_atomic(path: str, data):
+    import json
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path: str):
+    import json
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def shard_worker_id() -> str:
+    """Worker name recorded in claims and error files: host-pid."""
+    import socket
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def create_shard_job(filepath: str, job_dir: str, profile: str = DEFAULT_PROFILE,
+                     unit_size: int = SHARD_PARAGRAPHS_PER_UNIT) -> dict:
+    """Extract the paragraphs of filepath and publish them as TTS units in job_dir."""
+    import shutil
+
+    get_output_profile(profile)
+    para_data, pdf_doc = extract_video_paragraphs(filepath)
+    if pdf_doc is not None:
+        pdf_doc.close()
+
+    for sub in ("claims", "done", "errors", "parts"):
+        os.makedirs(os.path.join(job_dir, sub), exist_ok=True)
+    source = "source." + filepath.lower().split('.')[-1]
+    shutil.copyfile(filepath, os.path.join(job_dir, source))
+
+    job = {
+        "source": source,
+        "profile": profile,
+        # (text, page or paragraph index, PDF rect as [x0, y0, x1, y1] or None)
+        "paragraphs": [[text, idx, list(rect) if rect is not None else None]
+                       for text, idx, rect in para_data],
+        "tts_units": [[start, min(start + unit_size, len(para_data))]
+                      for start in range(0, len(para_data), unit_size)],
+    }
+    _write_json_atomic(os.path.join(job_dir, "job.json"), job)
+    return job
+
+
+def _shard_units(job_dir: str, job: dict) -> list[tuple]:
+    """(unit id, kind, k) of every published unit, TTS first."""
+    n = len(job["tts_units"])
+    units = [(f"tts_{k:05d}", "tts", k) for k in range(n)]
+    if os.path.exists(os.path.join(job_dir, "render.json")):
+        units += [(f"render_{k:05d}", "render", k) for k in range(n)]
+    return units
+
+
+def _claim_shard_unit(job_dir: str, unit_id: str, worker_id: str, lease: float) -> bool:
+    """Atomically claim unit_id (O_EXCL create), taking over an expired lease."""
+    claim = os.path.join(job_dir, "claims", unit_id)
+    for _ in range(2):
+        try:
+            fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(claim) < lease:
+                    return False
+                # Only one worker can rename the stale claim away
+                stale = f"{claim}.stale-{worker_id}"
+                os.rename(claim, stale)
+                os.remove(stale)
+            except OSError:
+                return False
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(worker_id)
+        return True
+    return False
 
-            if combined_audio:
-                audio_dur = combined_audio.duration
-                video_dur = para_video.duration
-                if audio_dur > video_dur:
-                    combined_audio = combined_audio.subclipped(0, video_dur)
-                para_video = para_video.with_audio(combined_audio)
 
-            clips.append(para_video)
+def _claim_next_shard_unit(job_dir: str, job: dict, worker_id: str, lease: float):
+    """Claim the first unit that is neither done nor failed too often; None if there is none."""
+    done = set(os.listdir(os.path.join(job_dir, "done")))
+    errors = os.listdir(os.path.join(job_dir, "errors"))
+    for unit_id, kind, k in _shard_units(job_dir, job):
+        if f"{unit_id}.json" in done:
+            continue
+        if sum(1 for e in errors if e.startswith(unit_id + ".")) >= SHARD_MAX_ATTEMPTS:
+            continue
+        if not _claim_shard_unit(job_dir, unit_id, worker_id, lease):
+            continue
+        if os.path.exists(os.path.join(job_dir, "done", f"{unit_id}.json")):
+            # Finished by the previous owner between listing and claiming
+            os.remove(os.path.join(job_dir, "claims", unit_id))
+            continue
+        return unit_id, kind, k
+    return None
 
-        # ── 6. Assemble final video ────────────────────────────────────────────
-        progress_callback(total, total, "Συναρμολόγηση βίντεο...")
-        await asyncio.sleep(0)
 
-        ui_logger = FletMoviepyLogger(progress_callback)
+class _ShardLease:
+    """Keep a unit claim fresh while the unit is processed; releases it on exit."""
 
-        final = concatenate_videoclips(clips, method="compose")
+    def __init__(self, claim_path: str, lease: float):
+        self.claim_path = claim_path
+        self.interval = lease / 4
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name="spyken-lease", daemon=True)
 
-        def _write_video():
-            final.write_videofile(
-                output_path,
-                fps=VIDEO_FPS,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile=os.path.join(temp_dir, "tmp_audio.m4a"),
-                remove_temp=True,
-                logger=ui_logger,
-            )
-            final.close()
+    def _beat(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.claim_path, None)
+            except OSError:
+                pass
 
-        await asyncio.to_thread(_write_video)
+    def __enter__(self):
+        self._thread.start()
+        return self
 
-    finally:
-        # Cleanup temp files
-        for f in os.listdir(temp_dir):
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        try:
+            os.remove(self.claim_path)
+        except OSError:
+            pass
+        return False
+
+
+async def _run_shard_tts_unit(job_dir: str, job: dict, k: int) -> dict:
+    """TTS the paragraphs of unit k into parts/; returns their audio files and timings."""
+    # Other processes read the parts, so they go straight to files in parts/
+    store = ScratchStore(limit_mb=0, directory=os.path.join(job_dir, "parts"))
+    start, end = job["tts_units"][k]
+    results = []
+    for i in range(start, end):
+        text = job["paragraphs"][i][0]
+        # Units run independently, so voices alternate by paragraph index
+        voice = pick_voice(text, i)
+        names, word_timings, duration, spoke = await synthesize_paragraph(text, voice, store, f"{i:06d}")
+        results.append({
+            "index": i,
+            "audio": names,
+            "word_timings": word_timings,
+            "duration": duration,
+            "spoke": spoke,
+        })
+    return {"paragraphs": results}
+
+
+async def _run_shard_render_unit(job_dir: str, job: dict, k: int, timeline_t: float,
+                                 worker_id: str, cache: dict) -> dict:
+    """Render unit k to a video-only segment in parts/, starting at timeline_t."""
+    prof = get_output_profile(job["profile"])
+    tts = _read_json(os.path.join(job_dir, "done", f"tts_{k:05d}.json"))["paragraphs"]
+    is_pdf = job["source"].endswith(".pdf")
+    if is_pdf and "pdf_doc" not in cache:
+        import fitz  # PyMuPDF
+        cache["pdf_doc"] = fitz.open(os.path.join(job_dir, job["source"]))
+    elif not is_pdf and "atlas" not in cache:
+        cache["atlas"] = WordAtlas()
+    pdf_doc = cache.get("pdf_doc")
+
+    total = len(job["paragraphs"])
+    clips = []
+    for p in tts:
+        text, idx, rect = job["paragraphs"][p["index"]]
+        if rect is not None:
+            import fitz  # PyMuPDF
+            rect = fitz.Rect(*rect)
+        clip = await render_paragraph_clip((text, idx, rect), p["word_timings"], p["duration"],
+                                           timeline_t, total, pdf_doc, prof, atlas=cache.get("atlas"))
+        timeline_t += p["duration"]
+        if clip is not None:
+            clips.append(clip)
+    if not clips:
+        return {"segment": None}
+
+    segment = f"video_{k:05d}.mp4"
+    tmp_path = os.path.join(job_dir, "parts", f"{worker_id}-{segment}")
+    set_job_stage("encode")
+    write_video_only(clips, tmp_path, prof)
+    os.replace(tmp_path, os.path.join(job_dir, "parts", segment))
+    return {"segment": segment}
+
+
+def run_shard_worker(job_dir: str, lease: float = SHARD_LEASE_S, log=None, tts_share: int = 1):
+    """
+    Claim and process units of the sharded job in job_dir until the
+    coordinator writes the `finished` marker. Safe to run on several hosts
+    against the same (shared) directory. log: optional callable for progress lines.
+    tts_share: number of workers on this host splitting the TTS rate limits;
+    the TTS circuit breaker is shared by every worker of the job.
+    """
+    import traceback
+
+    tts_scheduler.share(tts_share, os.path.join(job_dir, "tts_breaker"))
+    worker_id = shard_worker_id()
+    finished = os.path.join(job_dir, "finished")
+    job = None
+    starts = None
+    cache = {}
+    try:
+        while not os.path.exists(finished):
+            if job is None:
+                if not os.path.exists(os.path.join(job_dir, "job.json")):
+                    time.sleep(SHARD_POLL_S)
+                    continue
+                job = _read_json(os.path.join(job_dir, "job.json"))
+
+            unit = _claim_next_shard_unit(job_dir, job, worker_id, lease)
+            if unit is None:
+                time.sleep(SHARD_POLL_S)
+                continue
+            unit_id, kind, k = unit
             try:
-                os.remove(os.path.join(temp_dir, f))
+                with _ShardLease(os.path.join(job_dir, "claims", unit_id), lease):
+                    if kind == "tts":
+                        result = asyncio.run(_run_shard_tts_unit(job_dir, job, k))
+                    else:
+                        if starts is None:
+                            starts = _read_json(os.path.join(job_dir, "render.json"))["starts"]
+                        result = asyncio.run(_run_shard_render_unit(job_dir, job, k, starts[k],
+                                                                    worker_id, cache))
+                    _write_json_atomic(os.path.join(job_dir, "done", f"{unit_id}.json"), result)
+                if log:
+                    log(f"{worker_id}: {unit_id} ✓")
             except Exception:
-                pass
+                error_path = os.path.join(job_dir, "errors", f"{unit_id}.{worker_id}.{time.time_ns()}")
+                with open(error_path, "w", encoding="utf-8") as f:
+                    f.write(traceback.format_exc())
+                if log:
+                    log(f"{worker_id}: {unit_id} ✗")
+            finally:
+                set_job_stage(None)
+    finally:
+        if cache.get("pdf_doc") is not None:
+            cache["pdf_doc"].close()
+
+
+async def _wait_shard_units(job_dir: str, unit_ids: list[str], progress_callback, label: str,
+                            control: JobControl = None, procs: list = ()) -> list[dict]:
+    """Wait until every unit in unit_ids is done and return their results in order."""
+    done_dir = os.path.join(job_dir, "done")
+    errors_dir = os.path.join(job_dir, "errors")
+    total = len(unit_ids)
+    while True:
+        await job_checkpoint(control)
+        done = set(os.listdir(done_dir))
+        n_done = sum(1 for u in unit_ids if f"{u}.json" in done)
+        progress_callback(n_done, total, f"{label}: {n_done}/{total} τμήματα")
+        if n_done == total:
+            break
+        errors = sorted(os.listdir(errors_dir))
+        for u in unit_ids:
+            failed = [e for e in errors if e.startswith(u + ".")]
+            if len(failed) >= SHARD_MAX_ATTEMPTS:
+                with open(os.path.join(errors_dir, failed[-1]), encoding="utf-8") as f:
+                    last = f.read().strip().splitlines()[-1:]
+                raise ShardJobError(f"Το τμήμα {u} απέτυχε {len(failed)} φορές: {' '.join(last)}")
+        if procs and not any(p.is_alive() for p in procs):
+            raise ShardJobError("Όλες οι διεργασίες εργασίας τερματίστηκαν.")
+        await asyncio.sleep(SHARD_POLL_S)
+    return [_read_json(os.path.join(done_dir, f"{u}.json")) for u in unit_ids]
+
+
+async def convert_to_video_sharded(filepath: str, output_path: str, progress_callback,
+                                   profile: str = DEFAULT_PROFILE, control: JobControl = None,
+                                   sidecars=(), job_dir: str = None, workers: int = None,
+                                   lease: float = SHARD_LEASE_S):
+    """
+    Coordinator of a sharded convert_to_video: publishes the job in job_dir,
+    starts `workers` local worker processes (default: SHARD_LOCAL_WORKERS, at
+    most one per CPU; they split the TTS rate limits; 0 = rely on workers
+    started elsewhere with --worker job_dir), waits for the TTS
+    and render units and stitches the segments into output_path.
+    job_dir defaults to a temporary directory removed afterwards.
+    """
+    import multiprocessing
+    import shutil
+
+    own_dir = job_dir is None
+    job_dir = job_dir or tempfile.mkdtemp(prefix="spyken-job-")
+    if workers is None:
+        workers = min(SHARD_LOCAL_WORKERS, os.cpu_count() or 1)
+    prof = get_output_profile(profile)
+    procs = []
+
+    try:
+        set_job_stage("extract")
+        progress_callback(0, 0, "Προετοιμασία τμημάτων…")
+        job = await asyncio.to_thread(call_in_stage, "extract", create_shard_job, filepath, job_dir, profile)
+
+        ctx = multiprocessing.get_context("spawn")
+        for _ in range(workers):
+            proc = ctx.Process(target=run_shard_worker, args=(job_dir, lease, None, workers), daemon=True)
+            proc.start()
+            procs.append(proc)
+
+        set_job_stage("wait")
+        n_units = len(job["tts_units"])
+        tts = await _wait_shard_units(job_dir, [f"tts_{k:05d}" for k in range(n_units)],
+                                      progress_callback, "TTS", control, procs)
+
+        # Global timeline: start of every render unit, summed like convert_to_video
+        starts = []
+        timeline_t = 0.0
+        for unit in tts:
+            starts.append(timeline_t)
+            for p in unit["paragraphs"]:
+                timeline_t += p["duration"]
+        _write_json_atomic(os.path.join(job_dir, "render.json"), {"starts": starts})
+
+        renders = await _wait_shard_units(job_dir, [f"render_{k:05d}" for k in range(n_units)],
+                                          progress_callback, "Frames", control, procs)
+
+        progress_callback(n_units, n_units, "Συναρμολόγηση βίντεο...")
+        # The parts were written by the workers; the coordinator only reads them
+        store = ScratchStore(limit_mb=0, directory=os.path.join(job_dir, "parts"))
+        audio_parts = [store.adopt(name)
+                       for unit in tts for p in unit["paragraphs"] for name in p["audio"]]
+        segments = [store.path(store.adopt(r["segment"])) for r in renders if r["segment"]]
+        if not segments:
+            raise ValueError("Δεν δημιουργήθηκε βίντεο για κανένα τμήμα του αρχείου.")
+
+        cues = []
+        timeline_t = 0.0
+        for unit in tts:
+            for p in unit["paragraphs"]:
+                if p["spoke"]:
+                    append_cue(cues, p["index"], job["paragraphs"][p["index"]][0],
+                               timeline_t, p["duration"], p["word_timings"])
+                timeline_t += p["duration"]
+
+        set_job_stage("wait")
+        await asyncio.to_thread(finalize_video_job, [], segments, audio_parts, store, prof,
+                                output_path, cues=cues, sidecars=sidecars)
+
+    finally:
         try:
-            os.rmdir(temp_dir)
-        except Exception:
+            with open(os.path.join(job_dir, "finished"), "w"):
+                pass
+        except OSError:
             pass
+        for proc in procs:
+            proc.join(timeout=SHARD_LEASE_S / 4)
+            if proc.is_alive():
+                proc.terminate()
+        set_job_stage(None)
+        if own_dir:
+            shutil.rmtree(job_dir, ignore_errors=True)
 
 
 # ──────────────────────────── AUDIO CONVERSION ────────────────────────────────
 
-async def convert_to_audio(paragraphs: list[str], output_path: str, progress_callback):
-    temp_dir = tempfile.mkdtemp()
-    temp_files = []
+async def convert_to_audio(paragraphs: list[str], output_path: str, progress_callback,
+                           control: JobControl = None, sidecars=()):
+    """
+    Synthesize paragraphs into one mp3, alternating voices per chunk.
+    paragraphs may be a list or a lazy iterable (e.g. iter_paragraphs) so TTS
+    starts while the document is still being parsed; progress totals are then
+    reported as 0 (unknown).
+    sidecars: subtitle formats (see SIDECAR_FORMATS) to write next to the mp3;
+    requesting them switches TTS to the WordBoundary stream.
+    """
+    store = ScratchStore()
+    parts = []  # mp3 entries of store in playback order
+    chapters = []  # (index into parts, title, paragraph index), one per paragraph
+
+    def iter_chunks():
+        for p_idx, p in enumerate(paragraphs):
+            for c in chunk_text(p):
+                yield p_idx, c
+
+    if isinstance(paragraphs, list):
+        all_chunks = list(iter_chunks())  # (paragraph index, chunk text)
+        total = len(all_chunks)
+    else:
+        all_chunks = iter_chunks()
+        total = 0
+    voice_index = 0
+    time_offset = 0.0
+    cues = []
+    i = -1
 
-    all_chunks = []
-    for p in paragraphs:
-        all_chunks.extend(chunk_text(p))
+    try:
+        # Lazy paragraph iterables parse the document while the loop pulls chunks
+        set_job_stage("extract")
+        for i, (p_idx, chunk) in enumerate(all_chunks):
+            await job_checkpoint(control)
+            set_job_stage("tts")
+            voice = pick_voice(chunk, voice_index)
+            part = f"part_{i}.mp3"
+
+            word_timings = await synthesize_chunk(chunk, voice, store, part, word_timings=bool(sidecars))
+            if word_timings is not None:
+                if not chapters or chapters[-1][2] != p_idx:
+                    chapters.append((len(parts), textwrap.shorten(chunk, 60, placeholder="…"), p_idx))
+                parts.append(part)
+                voice_index += 1
+                if sidecars:
+                    duration = mp3_duration(store.view(part))
+                    append_cue(cues, p_idx, chunk, time_offset, duration,
+                               align_word_timings_to_text(word_timings, chunk))
+                    time_offset += duration
+
+            progress_callback(i + 1, total)
+            set_job_stage("extract")
+
+        if i < 0:
+            raise ValueError("Δεν βρέθηκε κείμενο στο αρχείο.")
+        set_job_stage("mux")
+        assemble_mp3(parts, output_path, [(part, title) for part, title, _ in chapters], store)
+        if sidecars:
+            write_sidecars(cues, output_path, sidecars)
 
-    total = len(all_chunks)
-    voice_index = 0
+    finally:
+        set_job_stage(None)
+        store.close()
 
-    for i, chunk in enumerate(all_chunks):
-        voice = (
-            (VOICE_EN_MALE if voice_index % 2 == 0 else VOICE_EN_FEMALE)
-            if is_english(chunk)
-            else (VOICE_MALE if voice_index % 2 == 0 else VOICE_FEMALE)
-        )
-        temp_file = os.path.join(temp_dir, f"part_{i}.mp3")
 
-        success = False
-        for attempt in range(3):
-            try:
-                communicate = edge_tts.Communicate(chunk, voice)
-                await communicate.save(temp_file)
-                if os.path.exists(temp_file) and os.path.getsize(temp_file) > 0:
-                    success = True
-                    break
-            except Exception:
-                await asyncio.sleep(0.5)
+# ─────────────────────────── STARTUP PROFILE ──────────────────────────────────
 
-        if success:
-            temp_files.append(temp_file)
-            voice_index += 1
+# Lazily imported subsystems, in the order a session typically loads them
+IMPORT_SUBSYSTEMS = {
+    "ui": ("flet",),
+    "pdf": ("fitz",),
+    "tts": ("edge_tts",),
+    "audio": ("mutagen.mp3",),
+    "video": ("numpy", "PIL.Image", "imageio_ffmpeg", "moviepy"),
+}
 
-        progress_callback(i + 1, total)
 
-    with open(output_path, "wb") as outfile:
-        for tf in temp_files:
-            with open(tf, "rb") as infile:
-                outfile.write(infile.read())
+def measure_import_costs(subsystems: dict = None) -> list[tuple]:
+    """
+    Import each subsystem in turn and return (name, seconds, error) tuples.
+    Shared dependencies are charged to the first subsystem that pulls them
+    in, so run this in a fresh process (python main.py --import-times).
+    """
+    import importlib
 
-    for tf in temp_files:
+    results = []
+    for name, modules in (subsystems or IMPORT_SUBSYSTEMS).items():
+        start = time.perf_counter()
+        error = None
         try:
-            os.remove(tf)
-        except Exception:
+            for mod in modules:
+                importlib.import_module(mod)
+        except Exception as ex:
+            error = str(ex)
+        results.append((name, time.perf_counter() - start, error))
+    return results
+
+
+# ─────────────────────────── RESIDENT SERVICE ─────────────────────────────────
+#
+# python main.py --serve keeps one process with the PDF/TTS/video stacks
+# imported, the ffmpeg binary located and the font/layout caches filled, and
+# runs conversions from a priority queue. Jobs arrive over a small JSON API
+# on localhost or from a watch folder; the GUI uses it when it is running.
+# Every request must carry the token written for this launch to a file only
+# the user can read (service_token_path), and outputs may only go next to the
+# input document or under the --output-dir folder.
+#
+#   GET  /status                  service state
+#   GET  /jobs, /jobs/<id>        job list / one job
+#   POST /jobs                    {"kind", "input_path", "output_path"?, "priority"?, "options"?}
+#   POST /jobs/<id>/<action>      action: cancel, pause, resume
+
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = int(os.environ.get("SPYKEN_PORT", "8765"))
+SERVICE_JOB_KINDS = ("mp3", "mp4", "both")
+SERVICE_TOKEN_HEADER = "X-Spyken-Token"
+SERVICE_DEFAULT_PRIORITY = 5     # lower runs first; FIFO within a priority
+SERVICE_MAX_FINISHED = 200       # finished jobs kept for status queries
+WATCH_POLL_S = 2.0
+
+
+def default_output_path(input_path: str, kind: str) -> str:
+    """Output next to the document: .mp3 for mp3 jobs, .mp4 otherwise."""
+    return os.path.splitext(input_path)[0] + (".mp3" if kind == "mp3" else ".mp4")
+
+
+def service_token_path(port: int = SERVICE_PORT) -> str:
+    """Per-user file holding the API token of the service on port."""
+    return os.path.join(os.path.expanduser("~"), ".spyken", f"service-{port}.token")
+
+
+def write_service_token(port: int, token: str):
+    """Store the token of this launch of the service, readable by the owner only."""
+    path = service_token_path(port)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+
+
+def read_service_token(port: int = SERVICE_PORT):
+    """Token of the running service on port, or None if there is none."""
+    try:
+        with open(service_token_path(port)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+async def run_service_job(job: dict, control: JobControl, progress_callback):
+    """Run one queued job (see ConversionService.submit) with the regular converters."""
+    kind, src, out = job["kind"], job["input_path"], job["output_path"]
+    opts = job["options"]
+    sidecars = tuple(opts.get("sidecars") or ())
+    with profiling_job(out, opts.get("profiling")):
+        if kind == "mp3":
+            await convert_to_audio(iter_paragraphs(src), out,
+                                   lambda current, total: progress_callback(current, total, ""),
+                                   control, sidecars=sidecars)
+        else:
+            video_fn = convert_to_slideshow if opts.get("slideshow") else convert_to_video
+            await video_fn(src, out, progress_callback, profile=opts.get("profile") or DEFAULT_PROFILE,
+                           control=control, sidecars=sidecars,
+                           mp3_path=default_output_path(out, "mp3") if kind == "both" else None)
+
+
+class ConversionService:
+    """
+    Job queue of the resident service. Jobs run one at a time (TTS is the
+    bottleneck and shares one scheduler) in a worker thread, highest
+    priority first; every job has a status (queued, running, done, failed,
+    cancelled) and its latest progress (current, total, message).
+    """
+
+    def __init__(self, output_dir: str = None):
+        import itertools
+        import queue
+
+        # Outputs are written as the service user: only next to the input or here
+        self.output_dir = os.path.realpath(output_dir) if output_dir else None
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._jobs = {}  # id -> job dict; "_control" is the JobControl of a running job
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._work, name="spyken-service", daemon=True)
+        self.started = time.time()
+        self.warmup = None  # [(subsystem, seconds, error)] once warm_up() finished
+
+    def start(self):
+        self._worker.start()
+
+    def warm_up(self):
+        """Import the conversion stacks, locate ffmpeg and load the default fonts."""
+        subsystems = {k: v for k, v in IMPORT_SUBSYSTEMS.items() if k != "ui"}
+        results = measure_import_costs(subsystems)
+        start = time.perf_counter()
+        error = None
+        try:
+            get_ffmpeg_exe()
+            _layout_docx_paragraph("Spyken", VIDEO_W, VIDEO_H)
+        except Exception as ex:
+            error = str(ex)
+        results.append(("ffmpeg+fonts", time.perf_counter() - start, error))
+        self.warmup = results
+
+    @staticmethod
+    def _public(job: dict) -> dict:
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def output_allowed(self, input_path: str, output_path: str, kind: str) -> bool:
+        """
+        True if output_path has the extension of kind and lies next to
+        input_path or under output_dir.
+        """
+        if not output_path.lower().endswith(".mp3" if kind == "mp3" else ".mp4"):
+            return False
+        out_dir = os.path.dirname(os.path.realpath(output_path))
+        if out_dir == os.path.dirname(os.path.realpath(input_path)):
+            return True
+        if self.output_dir is None:
+            return False
+        try:
+            return os.path.commonpath([out_dir, self.output_dir]) == self.output_dir
+        except ValueError:  # different drives
+            return False
+
+    def submit(self, kind: str, input_path: str, output_path: str = None,
+               priority: int = SERVICE_DEFAULT_PRIORITY, options: dict = None) -> dict:
+        """
+        Queue a conversion; raises ValueError for an unknown kind, a
+        missing/unsupported file or an output path outside the allowed folders.
+        """
+        import uuid
+
+        if kind not in SERVICE_JOB_KINDS:
+            raise ValueError(f"Άγνωστο είδος εργασίας: {kind}")
+        if not os.path.isfile(input_path) or not input_path.lower().endswith((".pdf", ".docx")):
+            raise ValueError(f"Μη υποστηριζόμενο ή ανύπαρκτο αρχείο: {input_path}")
+        output_path = os.path.abspath(output_path or default_output_path(input_path, kind))
+        if not self.output_allowed(input_path, output_path, kind):
+            raise ValueError("Η έξοδος επιτρέπεται μόνο δίπλα στο αρχείο εισόδου "
+                             f"ή στον φάκελο εξόδου της υπηρεσίας: {output_path}")
+        options = dict(options or {})
+        get_output_profile(options.get("profile") or DEFAULT_PROFILE)
+        if options.get("profiling") not in (None, *PROFILING_MODES):
+            raise ValueError(f"Άγνωστη λειτουργία profiling: {options['profiling']}")
+
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "input_path": os.path.abspath(input_path),
+            "output_path": output_path,
+            "priority": int(priority),
+            "options": options,
+            "status": "queued",
+            "progress": None,
+            "error": None,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+        }
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._queue.put((job["priority"], next(self._seq), job["id"]))
+            return self._public(job)
+
+    def job(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def jobs(self) -> list[dict]:
+        with self._lock:
+            return [self._public(job) for job in self._jobs.values()]
+
+    def status(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "service": "spyken",
+            "uptime": round(time.time() - self.started, 1),
+            "warm": self.warmup is not None,
+            "warmup": self.warmup,
+            "jobs": counts,
+            "tts": tts_scheduler.stats(),
+        }
+
+    def control(self, job_id: str, action: str):
+        """Apply cancel/pause/resume to a job; returns the job or None if unknown."""
+        if action not in ("cancel", "pause", "resume"):
+            raise ValueError(f"Άγνωστη ενέργεια: {action}")
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job["status"] == "queued" and action == "cancel":
+                job["status"] = "cancelled"
+                job["finished"] = time.time()
+            elif job["status"] == "running":
+                getattr(job["_control"], action)()
+            return self._public(job)
+
+    def _work(self):
+        while True:
+            _, _, job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] != "queued":
+                    continue
+                control = JobControl()
+                job.update(status="running", started=time.time(), _control=control)
+
+            def progress(current, total, msg=""):
+                job["progress"] = (current, total, msg)
+
+            status, error = "done", None
+            try:
+                asyncio.run(run_service_job(job, control, ThrottledProgress(progress)))
+            except ConversionCancelled:
+                status = "cancelled"
+            except Exception as ex:
+                status, error = "failed", str(ex)
+
+            with self._lock:
+                job.update(status=status, error=error, finished=time.time())
+                job.pop("_control", None)
+                self._prune()
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j["finished"] is not None]
+        for job in sorted(finished, key=lambda j: j["finished"])[:-SERVICE_MAX_FINISHED]:
+            del self._jobs[job["id"]]
+
+
+def _make_service_handler(service: ConversionService, port: int, token: str):
+    """Request handler class for the service's JSON API (requests must carry token)."""
+    import hmac
+    import json
+    from http.server import BaseHTTPRequestHandler
+
+    allowed_hosts = {f"{SERVICE_HOST}:{port}", f"localhost:{port}"}
+
+    class ServiceHandler(BaseHTTPRequestHandler):
+        server_version = "Spyken"
+
+        def log_message(self, format, *args):
             pass
+
+        def _send(self, code: int, data):
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self):
+            # Reject other Host headers (DNS rebinding) before routing
+            if self.headers.get("Host") not in allowed_hosts:
+                self._send(403, {"error": "forbidden"})
+                return None
+            sent = (self.headers.get(SERVICE_TOKEN_HEADER) or "").encode("utf-8")
+            if not hmac.compare_digest(sent, token.encode("utf-8")):
+                self._send(401, {"error": "unauthorized"})
+                return None
+            return [p for p in self.path.split("?")[0].split("/") if p]
+
+        def do_GET(self):
+            parts = self._route()
+            if parts is None:
+                return
+            if parts == ["status"]:
+                self._send(200, service.status())
+            elif parts == ["jobs"]:
+                self._send(200, service.jobs())
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = service.job(parts[1])
+                if job:
+                    self._send(200, job)
+                else:
+                    self._send(404, {"error": "no such job"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            parts = self._route()
+            if parts is None:
+                return
+            # Browsers cannot send application/json cross-origin without a preflight we never answer
+            if not (self.headers.get("Content-Type") or "").startswith("application/json"):
+                self._send(415, {"error": "expected application/json"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if parts == ["jobs"]:
+                    self._send(201, service.submit(
+                        body["kind"], body["input_path"], body.get("output_path"),
+                        body.get("priority", SERVICE_DEFAULT_PRIORITY), body.get("options")))
+                elif len(parts) == 3 and parts[0] == "jobs":
+                    job = service.control(parts[1], parts[2])
+                    if job:
+                        self._send(200, job)
+                    else:
+                        self._send(404, {"error": "no such job"})
+                else:
+                    self._send(404, {"error": "not found"})
+            except (KeyError, TypeError, ValueError) as ex:
+                self._send(400, {"error": str(ex)})
+
+    return ServiceHandler
+
+
+def watch_folder(service: ConversionService, folder: str, kind: str = "mp3",
+                 interval: float = WATCH_POLL_S, stop: threading.Event = None):
+    """
+    Queue a `kind` job for every .pdf/.docx in folder that is new or changed
+    and has no up-to-date output yet. A file is picked up once its size and
+    mtime are unchanged over two polls, i.e. it has finished copying.
+    """
+    stop = stop or threading.Event()
+    last_seen = {}    # path -> (size, mtime) at the previous poll
+    submitted = set()  # (path, mtime)
+    while not stop.wait(interval):
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name.lower()
+            if not name.endswith((".pdf", ".docx")) or name.startswith("~$") or not entry.is_file():
+                continue
+            st = entry.stat()
+            sig = (st.st_size, st.st_mtime)
+            stable = last_seen.get(entry.path) == sig
+            last_seen[entry.path] = sig
+            if not stable or (entry.path, st.st_mtime) in submitted:
+                continue
+            submitted.add((entry.path, st.st_mtime))
+            out = default_output_path(entry.path, kind)
+            if os.path.exists(out) and os.path.getmtime(out) >= st.st_mtime:
+                continue
+            try:
+                service.submit(kind, entry.path)
+            except ValueError:
+                pass
+
+
+def serve(port: int = SERVICE_PORT, watch_dir: str = None, watch_kind: str = "mp3",
+          output_dir: str = None):
+    """Run the resident service until interrupted."""
+    import secrets
+    from http.server import ThreadingHTTPServer
+
+    service = ConversionService(output_dir)
+    service.start()
+    threading.Thread(target=service.warm_up, name="spyken-warmup", daemon=True).start()
+    if watch_dir:
+        threading.Thread(target=watch_folder, args=(service, watch_dir, watch_kind),
+                         name="spyken-watch", daemon=True).start()
+
+    token = secrets.token_urlsafe(32)
+    httpd = ThreadingHTTPServer((SERVICE_HOST, port), _make_service_handler(service, port, token))
+    write_service_token(port, token)  # only once the port is ours
+    print(f"Spyken: υπηρεσία στο http://{SERVICE_HOST}:{port}"
+          + (f" — παρακολούθηση {watch_dir}" if watch_dir else ""), flush=True)
     try:
-        os.rmdir(temp_dir)
-    except Exception:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
         pass
+    finally:
+        httpd.server_close()
+        if read_service_token(port) == token:
+            os.remove(service_token_path(port))
+
+
+class ServiceClient:
+    """Minimal client of the resident service's JSON API."""
+
+    def __init__(self, port: int = SERVICE_PORT, timeout: float = 5.0):
+        import urllib.request
+
+        self.base = f"http://{SERVICE_HOST}:{port}"
+        self.port = port
+        self.timeout = timeout
+        # Never route localhost through an HTTP proxy from the environment
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def _request(self, method: str, path: str, data: dict = None, timeout: float = None):
+        """JSON request; raises OSError if the service is unreachable, RuntimeError on API errors."""
+        import json
+        import urllib.error
+        import urllib.request
+
+        req = urllib.request.Request(
+            self.base + path, method=method,
+            data=json.dumps(data).encode("utf-8") if data is not None else None,
+            # Read on every request: a restarted service has a new token
+            headers={"Content-Type": "application/json",
+                     SERVICE_TOKEN_HEADER: read_service_token(self.port) or ""},
+        )
+        try:
+            with self._opener.open(req, timeout=timeout or self.timeout) as resp:
+                return json.loads(resp.read())
+        except urllib.error.HTTPError as ex:
+            try:
+                message = json.loads(ex.read()).get("error")
+            except ValueError:
+                message = None
+            raise RuntimeError(message or f"HTTP {ex.code}") from None
+
+    def available(self, timeout: float = 0.3) -> bool:
+        try:
+            return self._request("GET", "/status", timeout=timeout).get("service") == "spyken"
+        except (OSError, RuntimeError, ValueError):
+            return False
+
+    def submit(self, kind: str, input_path: str, output_path: str = None,
+               priority: int = SERVICE_DEFAULT_PRIORITY, options: dict = None) -> dict:
+        return self._request("POST", "/jobs", {
+            "kind": kind, "input_path": input_path, "output_path": output_path,
+            "priority": priority, "options": options or {},
+        })
+
+    def job(self, job_id: str) -> dict:
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def action(self, job_id: str, action: str) -> dict:
+        return self._request("POST", f"/jobs/{job_id}/{action}", {})
+
+
+async def run_remote_job(client: ServiceClient, spec: dict, control: JobControl,
+                         progress_callback=None, poll: float = 0.3) -> dict:
+    """
+    Submit spec (ServiceClient.submit arguments) and follow the job,
+    forwarding pause/cancel from control and progress to progress_callback.
+    Raises ConversionCancelled / RuntimeError like a local conversion.
+    """
+    job = await asyncio.to_thread(client.submit, **spec)
+    remote_paused = False
+    cancel_sent = False
+    while True:
+        await asyncio.sleep(poll)
+        if control.cancelled and not cancel_sent:
+            await asyncio.to_thread(client.action, job["id"], "cancel")
+            cancel_sent = True
+        elif control.paused != remote_paused:
+            remote_paused = control.paused
+            await asyncio.to_thread(client.action, job["id"], "pause" if remote_paused else "resume")
+        job = await asyncio.to_thread(client.job, job["id"])
+        if progress_callback is not None and job["progress"]:
+            progress_callback(*job["progress"])
+        if job["status"] == "done":
+            return job
+        if job["status"] == "cancelled":
+            raise ConversionCancelled()
+        if job["status"] == "failed":
+            raise RuntimeError(job["error"])
 
 
 # ──────────────────────────────── UI ──────────────────────────────────────────
 
-def main(page: ft.Page):
+def main(page):
+    import flet as ft
+
     APP_VERSION = "1.5.0"
     page.title = "Spyken by spyalekos - Έγγραφο σε Ομιλία (MP3) & Βίντεο (MP4)"
     page.window.width = 680
@@ -906,18 +3864,122 @@ def main(page: ft.Page):
     progress_bar = ft.ProgressBar(width=440, color="amber", bgcolor="#263238", value=0)
     progress_bar.visible = False
 
+    profile_dropdown = ft.Dropdown(
+        label="Ποιότητα βίντεο",
+        value=DEFAULT_PROFILE,
+        width=220,
+        options=[ft.dropdown.Option(key, p["label"]) for key, p in OUTPUT_PROFILES.items()],
+    )
+
+    slideshow_checkbox = ft.Checkbox(
+        label="Γρήγορο βίντεο (μία διαφάνεια ανά σελίδα, χωρίς τονισμό λέξεων)",
+        value=False,
+    )
+
+    profiling_checkbox = ft.Checkbox(
+        label="Profiling (αναφορά χρόνου ανά στάδιο δίπλα στο αρχείο)",
+        value=bool(DEFAULT_PROFILING_MODE),
+    )
+
+    sidecar_checkbox = ft.Checkbox(
+        label="Υπότιτλοι με χρονισμό λέξεων (.vtt, .srt, .json)",
+        value=False,
+    )
+
+    preview_mode_dropdown = ft.Dropdown(
+        label="Προεπισκόπηση",
+        value="start",
+        width=220,
+        options=[ft.dropdown.Option(key, label) for key, label in PREVIEW_MODES.items()],
+    )
+    preview_image = ft.Image(src="", width=320, height=180, visible=False)
+    # Frames of the latest preview; created per preview, removed when replaced or on close
+    # (TemporaryDirectory also cleans up at interpreter exit)
+    preview_frames = {"dir": None}
+
+    def drop_preview_frames(e=None):
+        if preview_frames["dir"] is not None:
+            preview_frames["dir"].cleanup()
+            preview_frames["dir"] = None
+
+    page.on_disconnect = drop_preview_frames
+
     file_queue = []
+    current_job = {"control": None}
+    # Resident service (python main.py --serve): when it is running, jobs go there
+    service = {"client": None}
+    _client = ServiceClient()
+    if _client.available():
+        service["client"] = _client
 
     def log(msg, error=False):
         color = ft.Colors.RED_400 if error else ft.Colors.GREEN_400
         selected_files_list.controls.append(ft.Text(msg, color=color))
         page.update()
 
+    def log_tts_stats():
+        st = tts_scheduler.stats()
+        if st["requests"]:
+            log(tts_scheduler.format_stats(), error=bool(st["failed"] or st["rejected"]))
+
     def set_all_buttons(disabled: bool):
         pick_btn.disabled = disabled
         clear_btn.disabled = disabled
         convert_btn.disabled = disabled
         video_btn.disabled = disabled
+        both_btn.disabled = disabled
+        preview_btn.disabled = disabled
+        preview_mode_dropdown.disabled = disabled
+        profile_dropdown.disabled = disabled
+        slideshow_checkbox.disabled = disabled
+        sidecar_checkbox.disabled = disabled
+        profiling_checkbox.disabled = disabled
+        cancel_btn.disabled = not disabled
+        pause_btn.disabled = not disabled
+        page.update()
+
+    async def run_job(job_fn, spec: dict = None, progress=None):
+        """
+        Run job_fn(control) in a worker thread so the UI stays responsive, or,
+        with spec, on the resident service when one is reachable.
+        """
+        control = JobControl()
+        current_job["control"] = control
+        try:
+            client = service["client"]
+            if spec is not None and client is not None:
+                if await asyncio.to_thread(client.available):
+                    return await run_remote_job(client, spec, control, progress)
+                service["client"] = None
+                log("Η υπηρεσία Spyken δεν αποκρίνεται — οι μετατροπές γίνονται τοπικά.", error=True)
+            return await asyncio.wrap_future(run_in_worker(job_fn, control))
+        finally:
+            current_job["control"] = None
+            pause_btn.text = "Παύση"
+            pause_btn.icon = ft.Icons.PAUSE
+
+    def cancel_clicked(e):
+        control = current_job["control"]
+        if control is not None:
+            control.cancel()
+            status_text.value = "Ακύρωση..."
+            status_text.color = ft.Colors.ORANGE_400
+            page.update()
+
+    def pause_clicked(e):
+        control = current_job["control"]
+        if control is None:
+            return
+        if control.paused:
+            control.resume()
+            pause_btn.text = "Παύση"
+            pause_btn.icon = ft.Icons.PAUSE
+        else:
+            control.pause()
+            pause_btn.text = "Συνέχεια"
+            pause_btn.icon = ft.Icons.PLAY_ARROW
+            status_text.value = "Σε παύση"
+            status_text.color = ft.Colors.ORANGE_400
         page.update()
 
     async def pick_files_clicked(e):
@@ -949,6 +4011,7 @@ def main(page: ft.Page):
         progress_bar.visible = True
         progress_bar.value = 0
         page.update()
+        tts_scheduler.reset_stats()
 
         for filepath in file_queue:
             status_text.value = f"Εξαγωγή κειμένου: {os.path.basename(filepath)}"
@@ -956,25 +4019,44 @@ def main(page: ft.Page):
             page.update()
 
             try:
-                await asyncio.sleep(0.1)
-                paragraphs = extract_paragraphs(filepath)
-                if not paragraphs:
-                    log(f"Δεν βρέθηκε κείμενο στο {os.path.basename(filepath)}", error=True)
-                    continue
-
                 output_path = os.path.splitext(filepath)[0] + ".mp3"
+                loop = asyncio.get_running_loop()
 
                 def update_progress(current, total):
-                    progress_bar.value = current / total
-                    status_text.value = f"Δημιουργία ήχου: {current}/{total} παράγραφοι"
-                    page.update()
+                    def _update_ui():
+                        if total:
+                            progress_bar.value = current / total
+                            status_text.value = f"Δημιουργία ήχου: {current}/{total} παράγραφοι"
+                        else:
+                            # Streaming extraction: total not known yet
+                            progress_bar.value = None
+                            status_text.value = f"Δημιουργία ήχου: {current} τμήματα"
+                        status_text.color = ft.Colors.BLUE_400
+                        page.update()
+                    loop.call_soon_threadsafe(_update_ui)
 
-                await convert_to_audio(paragraphs, output_path, update_progress)
+                sidecars = SIDECAR_FORMATS if sidecar_checkbox.value else ()
+                profiling_mode = (DEFAULT_PROFILING_MODE or "sample") if profiling_checkbox.value else None
+
+                async def mp3_job(control):
+                    with profiling_job(output_path, profiling_mode):
+                        # Paragraphs are streamed from the parser into TTS
+                        await convert_to_audio(iter_paragraphs(filepath), output_path,
+                                               ThrottledProgress(update_progress), control,
+                                               sidecars=sidecars)
+
+                spec = {"kind": "mp3", "input_path": filepath, "output_path": output_path,
+                        "options": {"sidecars": list(sidecars), "profiling": profiling_mode}}
+                await run_job(mp3_job, spec, lambda current, total, msg="": update_progress(current, total))
                 log(f"Ολοκληρώθηκε: {os.path.basename(output_path)}")
 
+            except ConversionCancelled:
+                log(f"Ακυρώθηκε: {os.path.basename(filepath)}", error=True)
+                break
             except Exception as ex:
                 log(f"Σφάλμα στο {os.path.basename(filepath)}: {str(ex)}", error=True)
 
+        log_tts_stats()
         status_text.value = "Κατάσταση: Όλες οι μετατροπές ολοκληρώθηκαν!"
         status_text.color = ft.Colors.GREEN_400
         progress_bar.visible = False
@@ -982,7 +4064,7 @@ def main(page: ft.Page):
 
     # ── MP4 Conversion ────────────────────────────────────────────────────────
 
-    async def start_video_conversion(e):
+    async def start_video_conversion(e, with_mp3: bool = False):
         if not file_queue:
             status_text.value = "Παρακαλώ επιλέξτε αρχεία πρώτα!"
             status_text.color = ft.Colors.RED_400
@@ -993,6 +4075,7 @@ def main(page: ft.Page):
         progress_bar.visible = True
         progress_bar.value = 0
         page.update()
+        tts_scheduler.reset_stats()
 
         for filepath in file_queue:
             ext = filepath.lower().split('.')[-1]
@@ -1006,6 +4089,7 @@ def main(page: ft.Page):
 
             try:
                 output_path = os.path.splitext(filepath)[0] + ".mp4"
+                mp3_path = os.path.splitext(filepath)[0] + ".mp3" if with_mp3 else None
                 loop = asyncio.get_running_loop()
 
                 def update_video_progress(current, total, msg=""):
@@ -1016,17 +4100,104 @@ def main(page: ft.Page):
                         page.update()
                     loop.call_soon_threadsafe(_update_ui)
 
-                await convert_to_video(filepath, output_path, update_video_progress)
+                video_fn = convert_to_slideshow if slideshow_checkbox.value else convert_to_video
+                profile = profile_dropdown.value or DEFAULT_PROFILE
+                sidecars = SIDECAR_FORMATS if sidecar_checkbox.value else ()
+                profiling_mode = (DEFAULT_PROFILING_MODE or "sample") if profiling_checkbox.value else None
+
+                async def mp4_job(control):
+                    with profiling_job(output_path, profiling_mode):
+                        await video_fn(filepath, output_path, ThrottledProgress(update_video_progress),
+                                       profile=profile, control=control, sidecars=sidecars,
+                                       mp3_path=mp3_path)
+
+                spec = {"kind": "both" if with_mp3 else "mp4", "input_path": filepath,
+                        "output_path": output_path,
+                        "options": {"profile": profile, "slideshow": bool(slideshow_checkbox.value),
+                                    "sidecars": list(sidecars), "profiling": profiling_mode}}
+                await run_job(mp4_job, spec, update_video_progress)
                 log(f"🎬 Βίντεο: {os.path.basename(output_path)}")
+                if mp3_path:
+                    log(f"Ολοκληρώθηκε: {os.path.basename(mp3_path)}")
 
+            except ConversionCancelled:
+                log(f"Ακυρώθηκε: {os.path.basename(filepath)}", error=True)
+                break
             except Exception as ex:
                 log(f"Σφάλμα βίντεο στο {os.path.basename(filepath)}: {str(ex)}", error=True)
 
+        log_tts_stats()
         status_text.value = "Κατάσταση: Δημιουργία βίντεο ολοκληρώθηκε!"
         status_text.color = ft.Colors.GREEN_400
         progress_bar.visible = False
         set_all_buttons(False)
 
+    # ── Preview ───────────────────────────────────────────────────────────────
+
+    async def start_preview(e):
+        filepath = next((f for f in file_queue if f.lower().endswith(('.pdf', '.docx'))), None)
+        if filepath is None:
+            status_text.value = "Παρακαλώ επιλέξτε αρχεία πρώτα!"
+            status_text.color = ft.Colors.RED_400
+            page.update()
+            return
+
+        set_all_buttons(True)
+        progress_bar.visible = True
+        progress_bar.value = 0
+        drop_preview_frames()
+        preview_image.visible = False
+        preview_frames["dir"] = tempfile.TemporaryDirectory(prefix="spyken-preview-")
+        preview_dir = preview_frames["dir"].name
+        page.update()
+
+        output_path = os.path.splitext(filepath)[0] + ".preview.mp4"
+        loop = asyncio.get_running_loop()
+        frame_count = [0]
+
+        def update_preview_progress(current, total, msg=""):
+            def _update_ui():
+                progress_bar.value = current / max(total, 1)
+                status_text.value = f"👁 {msg}"
+                status_text.color = ft.Colors.CYAN_300
+                page.update()
+            loop.call_soon_threadsafe(_update_ui)
+
+        def show_frame(frame):
+            # Called from the worker thread: save the frame, then swap it in on the UI loop
+            from PIL import Image
+            frame_count[0] += 1
+            path = os.path.join(preview_dir, f"frame_{frame_count[0]}.png")
+            Image.fromarray(frame).save(path)
+
+            def _update_ui():
+                preview_image.src = path
+                preview_image.visible = True
+                page.update()
+            loop.call_soon_threadsafe(_update_ui)
+
+        mode = preview_mode_dropdown.value or "start"
+
+        async def preview_job(control):
+            await convert_to_preview(filepath, output_path, ThrottledProgress(update_preview_progress),
+                                     mode=mode, control=control, frame_callback=show_frame)
+
+        try:
+            await run_job(preview_job)
+            log(f"👁 Προεπισκόπηση: {os.path.basename(output_path)}")
+            status_text.value = "Κατάσταση: Η προεπισκόπηση είναι έτοιμη!"
+            status_text.color = ft.Colors.GREEN_400
+        except ConversionCancelled:
+            log(f"Ακυρώθηκε: {os.path.basename(filepath)}", error=True)
+        except Exception as ex:
+            log(f"Σφάλμα προεπισκόπησης στο {os.path.basename(filepath)}: {str(ex)}", error=True)
+        progress_bar.visible = False
+        set_all_buttons(False)
+
+    async def start_combined_conversion(e):
+        # One TTS pass: the MP3 is the soundtrack of the video
+        await start_video_conversion(e, with_mp3=True)
+
     # ── About dialog ──────────────────────────────────────────────────────────
 
     def open_about(e):
@@ -1095,6 +4266,38 @@ def main(page: ft.Page):
         style=ft.ButtonStyle(bgcolor=ft.Colors.PURPLE_700, color=ft.Colors.WHITE)
     )
 
+    both_btn = ft.ElevatedButton(
+        "MP3 + MP4",
+        icon=ft.Icons.LIBRARY_MUSIC,
+        on_click=start_combined_conversion,
+        tooltip="Και τα δύο αρχεία με μία σύνθεση ομιλίας",
+        style=ft.ButtonStyle(bgcolor=ft.Colors.TEAL_700, color=ft.Colors.WHITE)
+    )
+
+    preview_btn = ft.ElevatedButton(
+        "Προεπισκόπηση",
+        icon=ft.Icons.PREVIEW,
+        on_click=start_preview,
+        tooltip=f"Σύντομο βίντεο (~{PREVIEW_SECONDS} δευτ.) σε πρόχειρη ποιότητα",
+        style=ft.ButtonStyle(bgcolor=ft.Colors.CYAN_800, color=ft.Colors.WHITE)
+    )
+
+    pause_btn = ft.ElevatedButton(
+        "Παύση",
+        icon=ft.Icons.PAUSE,
+        on_click=pause_clicked,
+        disabled=True,
+        style=ft.ButtonStyle(bgcolor=ft.Colors.BLUE_GREY_700, color=ft.Colors.WHITE)
+    )
+
+    cancel_btn = ft.ElevatedButton(
+        "Ακύρωση",
+        icon=ft.Icons.STOP,
+        on_click=cancel_clicked,
+        disabled=True,
+        style=ft.ButtonStyle(bgcolor=ft.Colors.RED_900, color=ft.Colors.WHITE)
+    )
+
     # ── Layout ────────────────────────────────────────────────────────────────
 
     header = ft.Row(
@@ -1113,7 +4316,7 @@ def main(page: ft.Page):
     )
 
     button_row_top = ft.Row([pick_btn, clear_btn], alignment=ft.MainAxisAlignment.CENTER)
-    button_row_bottom = ft.Row([convert_btn, video_btn], alignment=ft.MainAxisAlignment.CENTER, spacing=20)
+    button_row_bottom = ft.Row([convert_btn, video_btn, both_btn], alignment=ft.MainAxisAlignment.CENTER, spacing=20)
 
     main_container = ft.Container(
         content=ft.Column(
@@ -1130,6 +4333,11 @@ def main(page: ft.Page):
                 ),
                 ft.Divider(height=8, color="transparent"),
                 button_row_bottom,
+                ft.Row([profile_dropdown, slideshow_checkbox], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Row([sidecar_checkbox, profiling_checkbox], alignment=ft.MainAxisAlignment.CENTER),
+                ft.Row([preview_mode_dropdown, preview_btn], alignment=ft.MainAxisAlignment.CENTER),
+                preview_image,
+                ft.Row([pause_btn, cancel_btn], alignment=ft.MainAxisAlignment.CENTER, spacing=20),
                 ft.Divider(height=8, color="transparent"),
                 ft.Column([status_text, progress_bar], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
             ],
@@ -1139,7 +4347,82 @@ def main(page: ft.Page):
     )
 
     page.add(main_container)
+    if service["client"] is not None:
+        log(f"Σύνδεση με την υπηρεσία Spyken ({service['client'].base})")
+
+
+def cli(argv: list[str] = None):
+    """Command-line entry point; without options it starts the GUI."""
+    global DEFAULT_PROFILING_MODE, MEMORY_BUDGET_MB
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="Spyken", description="Έγγραφο σε Ομιλία (MP3) & Βίντεο (MP4)")
+    parser.add_argument("--import-times", action="store_true",
+                        help="μέτρηση χρόνου εισαγωγής κάθε υποσυστήματος και έξοδος")
+    parser.add_argument("--profiling", choices=PROFILING_MODES, default=None,
+                        help="profiling κάθε μετατροπής (.collapsed ή .pstats δίπλα στο αρχείο εξόδου)")
+    parser.add_argument("--shard", nargs=2, metavar=("INPUT", "OUTPUT"),
+                        help="μετατροπή σε MP4 μοιρασμένη σε διεργασίες εργασίας (χωρίς GUI)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="τοπικές διεργασίες για --shard (προεπιλογή: έως 4, μοιράζονται το όριο TTS· 0: μόνο εξωτερικές)")
+    parser.add_argument("--job-dir", default=None,
+                        help="κοινόχρηστος φάκελος εργασίας για --shard (π.χ. σε δίσκο δικτύου)")
+    parser.add_argument("--profile", choices=list(OUTPUT_PROFILES), default=DEFAULT_PROFILE,
+                        help="προφίλ εξόδου για --shard")
+    parser.add_argument("--memory-mb", type=int, default=None,
+                        help=f"όριο μνήμης εργασιών βίντεο σε MB (προεπιλογή {MEMORY_BUDGET_MB}, 0: χωρίς όριο)")
+    parser.add_argument("--serve", action="store_true",
+                        help="μόνιμη υπηρεσία μετατροπών (API στο localhost, χρήση από το GUI)")
+    parser.add_argument("--port", type=int, default=SERVICE_PORT, help="θύρα της υπηρεσίας")
+    parser.add_argument("--watch", metavar="DIR", default=None,
+                        help="με --serve: μετατροπή κάθε νέου .pdf/.docx στον φάκελο DIR")
+    parser.add_argument("--watch-kind", choices=SERVICE_JOB_KINDS, default="mp3",
+                        help="είδος εξόδου για τα αρχεία του --watch")
+    parser.add_argument("--output-dir", metavar="DIR", default=None,
+                        help="με --serve: επιτρέπεται έξοδος και κάτω από τον φάκελο DIR "
+                             "(πάντα επιτρέπεται δίπλα στο αρχείο εισόδου)")
+    parser.add_argument("--worker", metavar="JOB_DIR",
+                        help="εκτέλεση τμημάτων της εργασίας στον φάκελο JOB_DIR")
+    args = parser.parse_args(argv)
+
+    if args.profiling:
+        DEFAULT_PROFILING_MODE = args.profiling
+    if args.memory_mb is not None:
+        MEMORY_BUDGET_MB = args.memory_mb
+
+    if args.import_times:
+        total = 0.0
+        for name, secs, error in measure_import_costs():
+            total += secs
+            print(f"{name:<8} {secs * 1000:8.1f} ms" + (f"  ({error})" if error else ""))
+        print(f"{'total':<8} {total * 1000:8.1f} ms")
+        return
+
+    if args.serve:
+        serve(args.port, args.watch, args.watch_kind, args.output_dir)
+        return
+
+    if args.worker:
+        run_shard_worker(args.worker, log=lambda line: print(line, flush=True))
+        return
+
+    if args.shard:
+        input_path, output_path = args.shard
+
+        def report(current, total, msg=""):
+            print(msg or f"{current}/{total}", flush=True)
+
+        with profiling_job(output_path, DEFAULT_PROFILING_MODE):
+            asyncio.run(convert_to_video_sharded(input_path, output_path, ThrottledProgress(report, 1),
+                                                 profile=args.profile, job_dir=args.job_dir,
+                                                 workers=args.workers))
+        return
+
+    import flet as ft
+    ft.app(target=main)
 
 
 if __name__ == "__main__":
-    ft.app(target=main)
+    import multiprocessing
+    multiprocessing.freeze_support()  # PDF extraction pool in the frozen build
+    cli()
@@ -0,0 +1,49 @@
+import zipfile
+
+from main import iter_docx_paragraphs
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+MC = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+WPS = "http://schemas.microsoft.com/office/word/2010/wordprocessingShape"
+V = "urn:schemas-microsoft-com:vml"
+
+
+def make_docx(path, body_xml):
+    xml = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+           f'<w:document xmlns:w="{W}" xmlns:mc="{MC}" xmlns:wps="{WPS}" xmlns:v="{V}">'
+           f'<w:body>{body_xml}</w:body></w:document>')
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("word/document.xml", xml)
+    return str(path)
+
+
+def para(text):
+    return f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>"
+
+
+def test_paragraphs_and_tables(tmp_path):
+    path = make_docx(tmp_path / "t.docx",
+                     para("First.")
+                     + f"<w:tbl><w:tr><w:tc>{para('Cell.')}</w:tc></w:tr></w:tbl>"
+                     + '<w:p><w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+                       '<w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r></w:p>')
+    assert list(iter_docx_paragraphs(path)) == ["First.", "Cell.", "a\tb\nc"]
+
+
+def test_text_box_read_once(tmp_path):
+    # Word writes the text box as DrawingML (mc:Choice) and again as VML (mc:Fallback)
+    text_box = (
+        "<w:r><mc:AlternateContent>"
+        f"<mc:Choice Requires=\"wps\"><w:drawing><wps:txbx><w:txbxContent>{para('Text box content.')}"
+        "</w:txbxContent></wps:txbx></w:drawing></mc:Choice>"
+        f"<mc:Fallback><w:pict><v:textbox><w:txbxContent>{para('Text box content.')}"
+        "</w:txbxContent></v:textbox></w:pict></mc:Fallback>"
+        "</mc:AlternateContent></w:r>"
+    )
+    path = make_docx(tmp_path / "t.docx",
+                     para("First body paragraph here.")
+                     + f"<w:p>{text_box}<w:r><w:t>Host paragraph.</w:t></w:r></w:p>"
+                     + para("Last."))
+    assert list(iter_docx_paragraphs(path)) == [
+        "First body paragraph here.", "Text box content.", "Host paragraph.", "Last.",
+    ]
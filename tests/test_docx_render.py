@@ -0,0 +1,11 @@
+from PIL import ImageFont
+
+import main
+
+
+def test_chrome_degrades_with_bitmap_font(monkeypatch):
+    # No TrueType font found: PIL's bitmap font rejects anchors and Greek text
+    bitmap = ImageFont.load_default_imagefont()
+    monkeypatch.setattr(main, "_load_font", lambda size: (bitmap, 14))
+    image = main.render_docx_paragraph_image("Hello world", 0, 3, highlight_word="world")
+    assert image.size == (main.VIDEO_W, main.VIDEO_H)
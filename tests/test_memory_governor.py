@@ -0,0 +1,19 @@
+import numpy as np
+
+from main import MemoryGovernor
+
+
+def test_shared_frames_count_once():
+    governor = MemoryGovernor(budget_mb=1, high_water=1.0)
+    base = np.zeros((360, 640, 3), dtype=np.uint8)  # 0.66 MB, shared by many clips
+    for _ in range(10):
+        governor.track(base)
+    assert governor.frame_bytes == base.nbytes
+    assert not governor.pressure()
+
+    governor.track(base.copy())
+    assert governor.pressure()
+    governor.released()
+    assert governor.frame_bytes == 0 and governor.spills == 1
+    governor.track(base)
+    assert governor.frame_bytes == base.nbytes
@@ -0,0 +1,83 @@
+import pytest
+
+from main import ScratchStore, assemble_mp3, mp3_duration, scan_mp3_frames
+
+FRAME_TIME = 576 / 24000  # MPEG-2 Layer III at 24 kHz, as edge-tts writes it
+
+
+def frame(br_idx=6):
+    """One silent MPEG-2 Layer III mono frame at 24 kHz (br_idx 6 = 48 kbps, 144 bytes)."""
+    header = (0x7FF << 21) | (2 << 19) | (1 << 17) | (1 << 16) | (br_idx << 12) | (1 << 10) | (3 << 6)
+    bitrate = (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)[br_idx] * 1000
+    data = bytearray(72 * bitrate // 24000)
+    data[0:4] = header.to_bytes(4, "big")
+    return bytes(data)
+
+
+def id3_tag(payload=b"\0" * 20):
+    n = len(payload)
+    size = bytes([(n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F])
+    return b"ID3\x03\x00\x00" + size + payload
+
+
+def mp3(n, br_idx=6):
+    return frame(br_idx) * n
+
+
+def test_scan_skips_tags_and_info_frame(tmp_path):
+    store = ScratchStore()
+    store.put("a.mp3", mp3(10))
+    assemble_mp3(["a.mp3"], str(tmp_path / "info.mp3"), store=store)
+    info_frame = (tmp_path / "info.mp3").read_bytes()[:144]
+
+    data = id3_tag() + info_frame + mp3(5) + b"TAG" + b"\0" * 125
+    frames, fmt = scan_mp3_frames(data)
+    assert len(frames) == 5
+    assert frames[0][0] == 30 + 144
+    assert [length for _, length, _ in frames] == [144] * 5
+    assert (fmt["sample_rate"], fmt["samples"], fmt["bitrate"]) == (24000, 576, 48000)
+
+
+def test_duration_from_frame_count():
+    assert mp3_duration(mp3(250)) == pytest.approx(250 * FRAME_TIME)
+    assert mp3_duration(memoryview(id3_tag() + mp3(3))) == pytest.approx(3 * FRAME_TIME)
+
+
+def test_assemble_writes_info_toc_and_chapters(tmp_path):
+    from mutagen.id3 import ID3
+
+    store = ScratchStore()
+    store.put("p0.mp3", id3_tag() + mp3(234))  # 5.616 s
+    store.put("p1.mp3", mp3(57))               # 1.368 s
+    out = tmp_path / "book.mp3"
+    assemble_mp3(["p0.mp3", "p1.mp3"], str(out), [(0, "Πρώτο"), (1, "Δεύτερο")], store)
+    data = out.read_bytes()
+
+    tag = ID3(str(out))
+    chapters = sorted(tag.getall("CHAP"), key=lambda c: c.start_time)
+    assert [(c.start_time, c.end_time) for c in chapters] == [(0, 5616), (5616, 6984)]
+    assert [c.sub_frames["TIT2"].text[0] for c in chapters] == ["Πρώτο", "Δεύτερο"]
+    assert tag.getall("CTOC")[0].child_element_ids == ["ch0", "ch1"]
+
+    # Info header frame right after the tag: frame count, stream size, TOC
+    frames, _ = scan_mp3_frames(data)
+    assert len(frames) == 291
+    assert mp3_duration(data) == pytest.approx(6.984)
+    start = frames[0][0] - 144
+    xing = data[start + 4 + 9:]
+    assert xing[:4] == b"Info"
+    assert int.from_bytes(xing[8:12], "big") == 291
+    assert int.from_bytes(xing[12:16], "big") == len(data) - start
+    toc = xing[16:116]
+    assert toc[0] == 0 and list(toc) == sorted(toc) and toc[-1] < 256
+
+
+def test_mixed_bitrates_get_xing_header(tmp_path):
+    out = tmp_path / "vbr.mp3"
+    (tmp_path / "a.mp3").write_bytes(mp3(4, 6))
+    (tmp_path / "b.mp3").write_bytes(mp3(4, 8))  # 64 kbps
+    assemble_mp3([str(tmp_path / "a.mp3"), str(tmp_path / "b.mp3")], str(out))
+    data = out.read_bytes()
+    frames, _ = scan_mp3_frames(data)
+    assert [bitrate for _, _, bitrate in frames] == [48000] * 4 + [64000] * 4
+    assert data[4 + 9:4 + 9 + 4] == b"Xing"
@@ -0,0 +1,130 @@
+import random
+
+import numpy as np
+
+from main import _pdf_column_gutters, layout_pdf_blocks, merge_pdf_blocks
+
+
+def block(x0, y0, x1, y1, text, no=0):
+    return (x0, y0, x1, y1, text, no, 0)
+
+
+def column(x0, x1, top, lines, prefix, line_h=12.0, gap=2.0):
+    return [block(x0, top + i * (line_h + gap), x1, top + i * (line_h + gap) + line_h, f"{prefix}{i}")
+            for i in range(lines)]
+
+
+def texts(result):
+    return [r[4] for r in result]
+
+
+def two_column_page():
+    title = block(72, 40, 540, 60, "Title")
+    left = column(72, 290, 80, 20, "L")
+    right = column(322, 540, 80, 20, "R")
+    page_no = block(300, 770, 312, 782, "7")
+    return title, left, right, page_no
+
+
+def test_two_columns_are_read_left_then_right():
+    title, left, right, page_no = two_column_page()
+    # fitz often returns blocks row by row across the columns
+    blocks = [title] + [b for pair in zip(left, right) for b in pair] + [page_no]
+    x0, y0, x1, y1 = np.array([b[:4] for b in blocks], dtype=float).T
+    gutters = _pdf_column_gutters(x0, y0, x1, y1)
+    assert len(gutters) == 1 and 290 <= gutters[0][0] < gutters[0][1] <= 322
+
+    result = layout_pdf_blocks(blocks)
+    assert texts(result) == [
+        "Title",
+        " ".join(f"L{i}" for i in range(20)),
+        " ".join(f"R{i}" for i in range(20)),
+        "7",
+    ]
+    assert result[1][:4] == (72.0, 80.0, 290.0, left[-1][3])
+
+
+def test_gutter_block_is_not_read_between_columns():
+    # Wide gutter: a centred footer sits in it without touching either column
+    left = column(72, 290, 80, 20, "L")
+    right = column(340, 540, 80, 20, "R")
+    footer = block(300, 770, 312, 782, "xii")
+    blocks = [b for pair in zip(left, right) for b in pair] + [footer]
+    assert texts(layout_pdf_blocks(blocks)) == [
+        " ".join(f"L{i}" for i in range(20)),
+        " ".join(f"R{i}" for i in range(20)),
+        "xii",
+    ]
+    # Same for a header above the columns
+    header = block(300, 40, 312, 52, "iv")
+    assert texts(layout_pdf_blocks([header] + blocks))[0] == "iv"
+
+
+def test_spanning_block_splits_columns_into_bands():
+    upper_left = column(72, 290, 80, 15, "a")
+    upper_right = column(322, 540, 80, 15, "b")
+    figure = block(72, 300, 540, 320, "Figure")
+    lower_left = column(72, 290, 340, 15, "c")
+    lower_right = column(322, 540, 340, 15, "d")
+    blocks = lower_right + [figure] + upper_right + lower_left + upper_left
+    assert [t[0] for t in texts(layout_pdf_blocks(blocks))] == ["a", "b", "F", "c", "d"]
+
+
+def test_short_side_text_does_not_split_page():
+    body = column(72, 400, 80, 30, "p")
+    note = block(480, 80, 540, 92, "note")
+    x0, y0, x1, y1 = np.array([b[:4] for b in body + [note]], dtype=float).T
+    assert len(_pdf_column_gutters(x0, y0, x1, y1)) == 0
+
+
+def sequential_merge(blocks):
+    """The single-column merge used before column detection, for comparison."""
+    text_blocks = [b for b in blocks if b[6] == 0]
+    merged = []
+    cur = list(text_blocks[0][:4]) + [text_blocks[0][4].strip()]
+    for b in text_blocks[1:]:
+        line_h = (cur[3] - cur[1]) / max(1, cur[4].count("\n") + 1)
+        v_gap = b[1] - cur[3]
+        h_overlap = min(cur[2], b[2]) - max(cur[0], b[0])
+        if 0 <= v_gap <= line_h * 1.8 and h_overlap > -20:
+            cur = [min(cur[0], b[0]), cur[1], max(cur[2], b[2]), b[3], cur[4] + " " + b[4].strip()]
+        else:
+            merged.append(tuple(cur))
+            cur = list(b[:4]) + [b[4].strip()]
+    merged.append(tuple(cur))
+    return [(x0, y0, x1, y1, " ".join(t.splitlines()).strip()) for x0, y0, x1, y1, t in merged]
+
+
+def test_single_column_matches_sequential_merge():
+    rng = random.Random(44)
+    for _ in range(20):
+        blocks, y = [], 72.0
+        for i in range(rng.randint(1, 20)):
+            # A paragraph is one or two multi-line blocks; the old merge
+            # overestimated the line height of longer merged runs
+            y += 60.0
+            x0 = 72.0 + rng.choice((0.0, 0.0, 18.0))
+            for part in range(rng.randint(1, 2)):
+                lines = rng.randint(1, 4)
+                text = "\n".join(f"w{i}.{part}.{k}" for k in range(lines))
+                blocks.append(block(x0, y, rng.uniform(400, 540), y + 12.0 * lines, text, len(blocks)))
+                y += 12.0 * lines + 2.0
+                x0 = 72.0
+        assert merge_pdf_blocks(blocks) == sequential_merge(blocks)
+
+
+def test_fragmented_three_columns_in_any_order():
+    cols = [column(72 + c * 170, 222 + c * 170, 80, 25, f"{c}_") for c in range(3)]
+    fragments = []
+    for c in cols:
+        for x0, y0, x1, y1, text, _, _ in c:
+            mid = (x0 + x1) / 2
+            fragments += [block(x0, y0, mid - 2, y1, text + "a"), block(mid + 2, y0, x1, y1, text + "b")]
+    random.Random(3).shuffle(fragments)
+    result = texts(layout_pdf_blocks(fragments))
+    assert result == [" ".join(f"{c}_{i}{h}" for i in range(25) for h in "ab") for c in range(3)]
+
+
+def test_empty_and_non_text_blocks():
+    assert layout_pdf_blocks([]) == []
+    assert layout_pdf_blocks([(0, 0, 10, 10, "img", 0, 1), block(0, 20, 10, 30, "  \n")]) == []
@@ -0,0 +1,35 @@
+import pytest
+
+from main import ConversionService
+
+
+@pytest.fixture
+def doc(tmp_path):
+    path = tmp_path / "in" / "book.pdf"
+    path.parent.mkdir()
+    path.write_bytes(b"%PDF-1.4\n")
+    return path
+
+
+def test_output_next_to_input(doc):
+    service = ConversionService()
+    job = service.submit("mp3", str(doc))
+    assert job["output_path"] == str(doc.with_suffix(".mp3"))
+    assert service.submit("mp4", str(doc), str(doc.parent / "other.mp4"))["status"] == "queued"
+
+
+def test_output_elsewhere_rejected(doc, tmp_path):
+    service = ConversionService()
+    with pytest.raises(ValueError):
+        service.submit("mp3", str(doc), str(tmp_path / "out.mp3"))
+    with pytest.raises(ValueError):
+        service.submit("mp3", str(doc), str(doc.parent / "notes.docx"))  # would overwrite a document
+
+
+def test_output_dir(doc, tmp_path):
+    out_dir = tmp_path / "out"
+    (out_dir / "sub").mkdir(parents=True)
+    service = ConversionService(output_dir=str(out_dir))
+    assert service.submit("both", str(doc), str(out_dir / "sub" / "b.mp4"))["status"] == "queued"
+    with pytest.raises(ValueError):
+        service.submit("mp4", str(doc), str(tmp_path / "outside" / "b.mp4"))
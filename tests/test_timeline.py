@@ -0,0 +1,32 @@
+from main import quantize_word_timeline
+
+
+def words(*offsets):
+    return [{"offset_s": t, "duration_s": 0.1, "word": f"w{i}"} for i, t in enumerate(offsets)]
+
+
+def test_runs_follow_word_offsets():
+    # 10 fps, 1 s: frame midpoints at 0.05, 0.15, ... 0.95
+    assert quantize_word_timeline(words(0.2, 0.5), 1.0, 10) == [(None, 2), (0, 3), (1, 5)]
+
+
+def test_sub_frame_words_are_dropped():
+    # w1 and w2 both fall between two frame midpoints: only w2 is shown
+    assert quantize_word_timeline(words(0.0, 0.31, 0.33, 0.6), 1.0, 10) == [(0, 3), (2, 3), (3, 4)]
+
+
+def test_frame_count_matches_audio_duration():
+    assert quantize_word_timeline([], 0.96, 10) == [(None, 10)]
+    assert sum(n for _, n in quantize_word_timeline(words(0.0), 2.34, 10)) == 23
+
+
+def test_no_drift_across_paragraphs():
+    # Paragraphs placed back to back on the global grid cover exactly the
+    # frames of the whole timeline, whatever their fractional lengths
+    durations = [0.37, 1.26, 0.74, 2.05, 0.33] * 20
+    start = 0.0
+    frames = 0
+    for d in durations:
+        frames += sum(n for _, n in quantize_word_timeline(words(0.0, d / 2), d, 10, start))
+        start += d
+    assert frames == round(start * 10)
@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+
+from main import ScratchStore, TTSScheduler, TTSUnavailableError, _is_throttle_error, synthesize_chunk
+import main
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+def fast_scheduler(**kw):
+    return TTSScheduler(rate=1000.0, burst=1000, base_delay=0.0, **kw)
+
+
+async def failing():
+    raise ValueError("no audio")
+
+
+def test_breaker_counts_failed_requests_not_attempts():
+    sched = fast_scheduler(max_attempts=4, breaker_threshold=3)
+
+    async def go():
+        assert await sched.run(failing) is None
+        assert await sched.run(failing) is None
+        assert await sched.run(failing, breaker=False) is None  # fallback of the last one
+        assert await sched.run(failing) is None  # third failed request trips the breaker
+        with pytest.raises(TTSUnavailableError):
+            await sched.run(failing)
+
+    asyncio.run(go())
+    assert sched.stats()["breaker_trips"] == 1
+
+
+def test_success_resets_breaker():
+    sched = fast_scheduler(max_attempts=2, breaker_threshold=2)
+
+    async def ok():
+        return "ok"
+
+    async def go():
+        for _ in range(5):
+            assert await sched.run(failing) is None
+            assert await sched.run(ok) == "ok"
+
+    asyncio.run(go())
+    assert sched.stats()["breaker_trips"] == 0
+
+
+def test_failed_chunks_do_not_stop_the_job(monkeypatch):
+    # Word-timed request and plain fallback both fail: the chunk is skipped,
+    # and one bad chunk counts once towards the breaker
+    sched = fast_scheduler(max_attempts=4, breaker_threshold=3)
+    monkeypatch.setattr(main, "tts_scheduler", sched)
+
+    class Broken:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        async def stream(self):
+            raise ValueError("no audio")
+            yield
+
+    monkeypatch.setattr("edge_tts.Communicate", Broken)
+
+    async def go():
+        store = ScratchStore()
+        assert await synthesize_chunk("Καλημέρα.", "el-GR-NestorasNeural", store, "a.mp3") is None
+        assert await synthesize_chunk("Καλησπέρα.", "el-GR-NestorasNeural", store, "b.mp3") is None
+        store.close()
+
+    asyncio.run(go())
+    assert sched.stats()["breaker_trips"] == 0
+
+
+def test_throttle_detection_uses_status():
+    assert _is_throttle_error(HTTPError(429))
+    assert not _is_throttle_error(HTTPError(503))
+    assert not _is_throttle_error(ValueError("received 1429 bytes"))
+    try:
+        try:
+            raise HTTPError(429)
+        except HTTPError as inner:
+            raise RuntimeError("handshake failed") from inner
+    except RuntimeError as outer:
+        assert _is_throttle_error(outer)
+
+
+def test_share_splits_limits_and_shares_breaker(tmp_path):
+    breaker = str(tmp_path / "tts_breaker")
+    a = TTSScheduler(rate=4.0, burst=4, max_concurrency=4, breaker_threshold=1)
+    b = TTSScheduler(rate=4.0, burst=4, max_concurrency=4, breaker_threshold=1)
+    for sched in (a, b):
+        sched.share(4, breaker)
+        sched.share(4, breaker)  # idempotent
+    assert (a.rate, a.burst, a.max_concurrency) == (1.0, 1, 1)
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    a.max_attempts = 1
+    assert asyncio.run(a.run(fail)) is None  # trips a's breaker ...
+    with pytest.raises(TTSUnavailableError):  # ... and b sees it through the file
+        asyncio.run(b.run(fail))